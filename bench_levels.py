@@ -0,0 +1,185 @@
+"""
+Offline message-replay benchmark for the Levels cog.
+
+Replays synthetic traffic through Levels.on_message against a temporary
+SQLite file, using lightweight stand-ins for discord.py objects, so it runs
+anywhere (CI included) without a Discord connection.
+
+Usage:
+    python bench_levels.py                          # every scenario
+    python bench_levels.py --scenario hot_users --messages 50000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import cogs.levels as levels
+from utils.metrics import registry
+
+
+# --- Stand-ins for discord.py objects ---
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.roles = {}
+        self.members = []
+
+    def get_role(self, role_id: int):
+        return self.roles.get(role_id)
+
+
+class FakeMember:
+    def __init__(self, user_id: int, guild: FakeGuild):
+        self.id = user_id
+        self.guild = guild
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+        self.roles = []
+
+    async def add_roles(self, *roles, reason=None):
+        self.roles.extend(roles)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, content):
+        self.sent += 1
+
+
+class FakeMessage:
+    def __init__(self, author: FakeMember, channel: FakeChannel):
+        self.author = author
+        self.guild = author.guild
+        self.channel = channel
+        self.webhook_id = None
+
+
+# --- Traffic shapes ---
+# Each returns a list of (guild index, user index) pairs, one per message.
+
+def many_users(rng, messages, users, guilds):
+    return [(0, rng.randrange(users)) for _ in range(messages)]
+
+
+def hot_users(rng, messages, users, guilds):
+    # 80% of the traffic comes from 1% of the users
+    hot = max(1, users // 100)
+    return [(0, rng.randrange(hot) if rng.random() < 0.8 else rng.randrange(users)) for _ in range(messages)]
+
+
+def many_guilds(rng, messages, users, guilds):
+    return [(rng.randrange(guilds), rng.randrange(users)) for _ in range(messages)]
+
+
+def levelup_storm(rng, messages, users, guilds):
+    # Few users and a huge XP rate (set in run_scenario), so nearly every message levels someone up
+    return [(0, rng.randrange(min(users, 50))) for _ in range(messages)]
+
+
+SCENARIOS = {
+    "many_users": many_users,
+    "hot_users": hot_users,
+    "many_guilds": many_guilds,
+    "levelup_storm": levelup_storm,
+}
+
+
+def db_seconds() -> float:
+    """Time spent waiting on SQLite so far, from the db_query_seconds histograms the connections record."""
+    return sum(h.sum for _, h in registry.histograms_named("db_query_seconds"))
+
+
+async def run_scenario(name: str, messages: int, users: int, guilds: int, xp_rate: int, cooldown: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    tmp_dir = tempfile.mkdtemp(prefix="levels_bench_")
+    levels.DB_FILE = os.path.join(tmp_dir, "levels.db")
+
+    cog = levels.Levels(bot=None)
+    with contextlib.redirect_stdout(io.StringIO()): # keep the cog's startup prints out of the report
+        await cog.cog_load()
+
+    if name == "levelup_storm":
+        xp_rate = max(xp_rate, 5000)
+
+    fake_guilds = [FakeGuild(1000 + i) for i in range(guilds)]
+    channels = [FakeChannel(5000 + i) for i in range(guilds)]
+    for guild in fake_guilds:
+        cog.guild_settings[guild.id] = {"xp_rate": xp_rate, "xp_cooldown": cooldown}
+    members = {}
+
+    traffic = SCENARIOS[name](rng, messages, users, guilds)
+    latencies = []
+
+    tracemalloc.start()
+    db_before = db_seconds()
+    start = time.perf_counter()
+    for guild_index, user_index in traffic:
+        key = (guild_index, user_index)
+        member = members.get(key)
+        if member is None:
+            member = members[key] = FakeMember(10_000 + user_index, fake_guilds[guild_index])
+        message = FakeMessage(member, channels[guild_index])
+
+        t0 = time.perf_counter()
+        await cog.on_message(message)
+        latencies.append(time.perf_counter() - t0)
+
+    # Include the final write-behind flush and ledger compaction, they are part of the cost
+    await cog.compact_xp()
+    elapsed = time.perf_counter() - start
+    db_elapsed = db_seconds() - db_before
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await cog.cog_unload()
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "messages": messages,
+        "throughput": messages / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "db_share": db_elapsed / elapsed,
+        "peak_mb": peak / (1024 * 1024),
+        "announcements": sum(c.sent for c in channels),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic traffic through Levels.on_message")
+    parser.add_argument("--scenario", choices=list(SCENARIOS) + ["all"], default="all")
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--guilds", type=int, default=50, help="Used by the many_guilds scenario")
+    parser.add_argument("--xp-rate", type=int, default=10)
+    parser.add_argument("--cooldown", type=int, default=0, help="XP cooldown in seconds (0 = every message earns XP)")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+
+    print(f"{'Scenario':<15} | {'msg/s':>10} | {'p50 ms':>8} | {'p99 ms':>8} | {'DB %':>6} | {'Peak MB':>8} | {'Sent':>6}")
+    print("-" * 78)
+    for name in names:
+        guilds = args.guilds if name == "many_guilds" else 1
+        r = asyncio.run(run_scenario(name, args.messages, args.users, guilds, args.xp_rate, args.cooldown, args.seed))
+        print(
+            f"{r['scenario']:<15} | {r['throughput']:>10.0f} | {r['p50_ms']:>8.3f} | {r['p99_ms']:>8.3f} | "
+            f"{r['db_share'] * 100:>5.1f}% | {r['peak_mb']:>8.2f} | {r['announcements']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
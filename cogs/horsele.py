@@ -1,7 +1,8 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from typing import List
+
+from utils.wordle_scoring import Board
 
 TARGET_WORD = "HORSE"
 
@@ -18,62 +19,22 @@ class Horsele(commands.Cog):
 class HorseleView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
-        self.guesses: List[str] = []
+        self.board = Board(TARGET_WORD)
         self.ended = False
 
     def get_embed(self) -> discord.Embed:
         embed = discord.Embed(title="Horsele", description="Guess the 5-letter word!", color=discord.Color.green())
         
-        board_str = ""
-        for guess in self.guesses:
-            line = self.format_guess(guess)
-            board_str += line + "\n"
-        
-        # Determine how many empty rows are left
-        remaining_rows = 6 - len(self.guesses)
-        for _ in range(remaining_rows):
-            board_str += "⬛ ⬛ ⬛ ⬛ ⬛\n"
-            
-        embed.description = board_str
+        embed.description = self.board.render()
         
         if self.ended:
-            if self.guesses and self.guesses[-1] == TARGET_WORD:
+            if self.board.solved:
                 embed.set_footer(text="You Won! 🐴")
             else:
                 embed.set_footer(text=f"You Lost! The word was {TARGET_WORD} (obviously).")
                 
         return embed
 
-    def format_guess(self, guess: str) -> str:
-        # Use simple frequency counters for the logic (logic for duplicates)
-        target_freq = {}
-        for char in TARGET_WORD:
-            target_freq[char] = target_freq.get(char, 0) + 1
-            
-        result = [""] * 5
-        guess_upper = guess.upper()
-        
-        # First Pass: Green
-        for i in range(5):
-            letter = guess_upper[i]
-            if letter == TARGET_WORD[i]:
-                result[i] = "🟩"
-                target_freq[letter] -= 1
-        
-        # Second Pass: Yellow
-        for i in range(5):
-            if result[i] != "":
-                continue
-                
-            letter = guess_upper[i]
-            if letter in target_freq and target_freq[letter] > 0:
-                result[i] = "🟨"
-                target_freq[letter] -= 1
-            else:
-                result[i] = "⬛"
-                
-        return " ".join(result)
-
     @discord.ui.button(label="Guess", style=discord.ButtonStyle.primary, emoji="🐴")
     async def guess_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.ended:
@@ -124,17 +85,17 @@ class GuessModal(discord.ui.Modal, title="Enter your guess"):
             await interaction.response.send_message("Only letters are allowed!", ephemeral=True)
             return
 
-        # Add guess
-        self.game_view.guesses.append(guess)
+        # Score it and add its row to the board
+        self.game_view.board.add_guess(guess)
         
         # Check Win/Loss
-        if guess == TARGET_WORD:
+        if self.game_view.board.solved:
             self.game_view.ended = True
             for child in self.game_view.children:
                 child.disabled = True
             self.game_view.stop()
             
-        elif len(self.game_view.guesses) >= 6:
+        elif self.game_view.board.full:
             self.game_view.ended = True
             for child in self.game_view.children:
                 child.disabled = True
@@ -1,19 +1,179 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-import aiosqlite
+import asyncio
 import os
 import math
+import tempfile
 import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+
+from utils import level_curve, levels_db, levels_io, sharding
+from utils.announcements import AnnouncementQueue, join_names
+from utils.cooldowns import CooldownStore
+from utils.metrics import registry as metrics
+from utils.ranking import GuildRanking, RankingIndex
 
 # Database file path
 DB_FILE = "/app/data/levels.db" if os.path.exists("/app/data") else "./data/levels.db"
 
+# Read-only connections used by read-only commands (the writer stays a single connection)
+DB_READERS = int(os.getenv('LEVELS_DB_READERS', 2))
+
+# Reward reconciliation: pause between member edits, and members per checkpoint
+RECONCILE_EDIT_INTERVAL = float(os.getenv('RECONCILE_EDIT_INTERVAL', 0.5))
+RECONCILE_CHECKPOINT_EVERY = 50
+
+# Interaction followups can be edited for 15 minutes, stop a bit before
+INTERACTION_EDIT_WINDOW = 14 * 60
+
+# Level-up/reward announcements landing within this many seconds are merged into one message
+ANNOUNCE_WINDOW = float(os.getenv('ANNOUNCE_WINDOW', 1.5))
+
+# Rows per /leaderboard page
+LEADERBOARD_PAGE_SIZE = 10
+
+# Time-windowed leaderboards: SQLite date modifiers that turn a unix time into the
+# start of its bucket (UTC), and how long buckets are kept. Weeks start on Monday.
+LEADERBOARD_PERIODS = {
+    "daily": ("start of day",),
+    "weekly": ("start of day", "weekday 0", "-6 days"),
+    "monthly": ("start of month",),
+}
+BUCKET_RETENTION = {
+    "daily": 14 * 86400,
+    "weekly": 8 * 7 * 86400,
+    "monthly": 400 * 86400,
+}
+BUCKET_PRUNE_INTERVAL = 3600 # seconds between prunes
+PERIOD_TITLES = {None: "Server Leaderboard", "daily": "Today's Leaderboard", "weekly": "This Week's Leaderboard", "monthly": "This Month's Leaderboard"}
+
+
+def bucket_start_sql(period: str, timestamp: str) -> str:
+    """SQL expression for the start of the `period` bucket containing `timestamp` (a column or '?')."""
+    modifiers = "".join(f", '{m}'" for m in LEADERBOARD_PERIODS[period])
+    return f"CAST(strftime('%s', {timestamp}, 'unixepoch'{modifiers}) AS INTEGER)"
+
+# Write-behind settings: pending XP is flushed every XP_FLUSH_INTERVAL seconds,
+# or as soon as XP_FLUSH_THRESHOLD distinct users are waiting to be written.
+XP_FLUSH_INTERVAL = float(os.getenv('XP_FLUSH_INTERVAL', 5))
+XP_FLUSH_THRESHOLD = int(os.getenv('XP_FLUSH_THRESHOLD', 500))
+
+# XP ledger: events are folded into the users snapshot every XP_COMPACT_INTERVAL seconds.
+# Events older than XP_HISTORY_DAYS are squashed into one opening balance per member (0 keeps everything).
+XP_COMPACT_INTERVAL = float(os.getenv('XP_COMPACT_INTERVAL', 30))
+XP_HISTORY_DAYS = int(os.getenv('XP_HISTORY_DAYS', 0))
+XP_SQUASH_INTERVAL = 86400 # seconds between history squashes
+
+# /sync_xp backfill: channels scanned at once, and messages per write batch / checkpoint
+BACKFILL_CONCURRENCY = 3
+BACKFILL_BATCH_SIZE = 500
+
+class LeaderboardView(discord.ui.View):
+    """
+    Paginated leaderboard. Pages are fetched with keyset pagination on (xp, user_id),
+    so turning to page 500 costs the same as turning to page 2.
+    """
+    def __init__(self, cog, guild, rows, has_next, period: str = None):
+        super().__init__(timeout=180)
+        self.cog = cog
+        self.guild = guild
+        self.period = period # None for all time, else a LEADERBOARD_PERIODS key
+        self.rows = rows # [(user_id, xp, level)] on the current page, level is None for periods
+        self.page = 0
+        self.has_next = has_next
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.prev_button.disabled = self.page == 0
+        self.next_button.disabled = not self.has_next
+
+    def get_embed(self) -> discord.Embed:
+        embed = discord.Embed(title=f"🏆 {PERIOD_TITLES[self.period]}", color=discord.Color.gold())
+        description = ""
+
+        start = self.page * LEADERBOARD_PAGE_SIZE
+        for index, (user_id, xp, level) in enumerate(self.rows, start=start + 1):
+            # We try to fetch member from cache mainly
+            member = self.guild.get_member(user_id)
+            name = member.display_name if member else f"User {user_id}"
+
+            if level is None:
+                description += f"**{index}. {name}** - {xp} XP\n"
+            else:
+                description += f"**{index}. {name}** - Lvl {level} ({xp} XP)\n"
+
+        embed.description = description
+        embed.set_footer(text=f"Page {self.page + 1}")
+        return embed
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        first_user_id, first_xp, _ = self.rows[0]
+        rows, _ = await self.cog.fetch_leaderboard_page(self.guild.id, before=(first_xp, first_user_id), period=self.period)
+        if not rows:
+            await interaction.response.defer()
+            return
+
+        self.rows = rows
+        self.page = max(self.page - 1, 0)
+        self.has_next = True
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.get_embed(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        last_user_id, last_xp, _ = self.rows[-1]
+        rows, has_next = await self.cog.fetch_leaderboard_page(self.guild.id, after=(last_xp, last_user_id), period=self.period)
+        if not rows:
+            self.has_next = False
+            self.update_buttons()
+            await interaction.response.edit_message(view=self)
+            return
+
+        self.rows = rows
+        self.page += 1
+        self.has_next = has_next
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.get_embed(), view=self)
+
+
 class Levels(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = None
-        self.cooldowns = {} # user_id -> timestamp
+        self.db = None # single writer connection, every mutation goes through write()/ledger_write()
+        self.read_db = None # ReaderPool for read-only commands
+        self.cooldowns = CooldownStore() # (guild_id, user_id) -> cooldown expiry, evicted once expired
+
+        # Write-behind XP state. Members' current XP and level live in the ranking index below.
+        self.pending_xp = {} # (guild_id, user_id) -> XP not yet written to the DB
+        # Held for every transaction on the writer connection, so transactions never interleave
+        self.write_lock = asyncio.Lock()
+        self.last_bucket_prune = 0.0
+        self.last_history_squash = 0.0
+
+        # Guild settings cache, filled at cog_load and kept in sync by the setters
+        self.guild_settings = {} # guild_id -> {"xp_rate": int, "xp_cooldown": int}
+        self.cache_stats = {"settings_hits": 0, "settings_misses": 0}
+
+        # Live XP ordering per guild, rebuilt from the DB at cog_load
+        self.rankings = RankingIndex()
+
+        # Level rewards cache, filled at cog_load and kept in sync by admin_add/remove_reward
+        self.reward_cache = {} # guild_id -> {level: role_id}
+        self.reconcile_tasks = {} # guild_id -> running reward reconciliation task
+
+        # Level-up announcements are sent in the background, merged per channel
+        self.announcements = AnnouncementQueue(self.render_announcements, ANNOUNCE_WINDOW)
+
+    def get_cooldown_store_size(self) -> int:
+        """Number of (guild, user) pairs currently on XP cooldown."""
+        return self.cooldowns.size
+
+    # --- Helper Methods ---
+    # All level math lives in utils/level_curve.py (closed form, O(1)).
+    # These wrappers are kept so existing callers don't need to change.
 
     def get_xp_for_next_level(self, current_level: int) -> int:
         """
@@ -22,143 +182,880 @@ class Levels(commands.Cog):
         L=2 -> 220
         L=10 -> 1100
         """
-        return 5 * (current_level ** 2) + 50 * current_level + 100
+        return level_curve.xp_for_next_level(current_level)
 
     def get_total_xp_for_level(self, target_level: int) -> int:
-        """Sum of XP needed for all levels up to target_level - 1"""
-        total = 0
-        for i in range(1, target_level):
-            total += self.get_xp_for_next_level(i)
-        return total
-
-    # --- Public Admin Methods (API) ---
-
-    # --- Helper Methods ---
+        """Total XP at the start of target_level (same as calculate_xp_for_level)"""
+        return level_curve.total_xp_for_level(target_level)
 
     def calculate_xp_for_level(self, level: int) -> int:
         """
         Calculates the TOTAL cumulative XP required to reach a specific level.
         Uses the MEE6 formula: Sum of (5*L^2 + 50*L + 100) for L=0 to level-1.
         """
-        total_xp = 0
-        for i in range(level):
-            total_xp += 5 * (i ** 2) + 50 * i + 100
-        return total_xp
+        return level_curve.total_xp_for_level(level)
 
     def calculate_level_from_xp(self, xp: int) -> int:
         """
-        Calculates the level corresponding to a given amount of XP.
+        Calculates the level corresponding to a given amount of XP (never below level 1,
+        same rule as the member_level SQL function).
         """
-        level = 0
-        while True:
-            xp_needed = 5 * (level ** 2) + 50 * level + 100
-            if xp >= xp_needed:
-                xp -= xp_needed
-                level += 1
-            else:
-                return level
+        return level_curve.member_level(xp)
 
     def calculate_xp_step(self, level: int) -> int:
         """Returns the XP required to go from current level to next."""
-        return 5 * (level ** 2) + 50 * level + 100
+        return level_curve.xp_for_next_level(level)
 
-    # --- Public Admin Methods (API) ---
+    # --- Write-Behind XP ---
 
-    async def admin_give_xp(self, user_id: int, guild_id: int, amount: int):
-        """Adds (or removes) XP and returns the new total XP."""
-        await self.db.execute("""
-            INSERT INTO users (user_id, guild_id, xp, level)
-            VALUES (?, ?, ?, 0)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET xp = xp + ?
-        """, (user_id, guild_id, amount, amount))
-        await self.db.commit()
-        
-        async with self.db.execute("SELECT xp FROM users WHERE user_id = ? AND guild_id = ?", (user_id, guild_id)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                new_xp = row['xp']
-                correct_level = self.calculate_level_from_xp(new_xp)
-                await self.db.execute("UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?", (correct_level, user_id, guild_id))
-                await self.db.commit()
-                return new_xp
+    def set_known_totals(self, guild_id: int, user_id: int, xp: int, level: int):
+        """
+        Updates the ranking index with a member's totals as just read from the DB,
+        plus any chat XP still waiting in the write-behind buffer.
+        """
+        self.rankings.update(guild_id, user_id, xp + self.pending_xp.get((guild_id, user_id), 0), level)
+
+    async def flush_xp(self):
+        """
+        Appends all pending chat XP to the xp_events ledger in a single transaction
+        (one event per user per flush). The users table only sees it once it is compacted,
+        writes that touch users directly go through ledger_write().
+
+        The write runs shielded: cancelling the caller (e.g. cog_unload stopping flush_loop)
+        never cuts a transaction in half, and the final flush waits for it on write_lock.
+        """
+        await asyncio.shield(self.write_pending_xp())
+
+    async def write_pending_xp(self):
+        async with self.write_lock:
+            # Checked under the lock: a flush that failed while we were waiting has put its batch back
+            if not self.pending_xp:
+                return
+
+            # Swap the buffer out first, messages arriving during the write go into a fresh one
+            batch = self.pending_xp
+            self.pending_xp = {}
+
+            try:
+                async with self.transaction():
+                    await self.append_xp_events([(guild_id, user_id, "message", amount, None) for (guild_id, user_id), amount in batch.items()])
+            except Exception:
+                # Put the XP back so it is retried on the next flush instead of being lost
+                for key, amount in batch.items():
+                    self.pending_xp[key] = self.pending_xp.get(key, 0) + amount
+                raise
+
+    @tasks.loop(seconds=XP_FLUSH_INTERVAL)
+    async def flush_loop(self):
+        try:
+            await self.flush_xp()
+        except Exception as e:
+            print(f"Levels Cog: XP flush failed, will retry. ({e})")
+
+    # --- Writes ---
+    # The writer connection is shared by every coroutine of the cog. A statement executed
+    # outside a transaction of ours would open an implicit one (or commit someone else's
+    # half-done work), so nothing writes to self.db without holding write_lock.
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT on the writer, rolled back if the block raises. The caller holds write_lock.
+        Waits up to WRITE_LOCK_WAIT for another cluster's write transaction to finish.
+        """
+        try:
+            # Inside the try: if we are cancelled while BEGIN runs, it may still open the transaction
+            await levels_db.begin_immediate(self.db, levels_db.WRITE_LOCK_WAIT)
+            yield
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            raise
+
+    @asynccontextmanager
+    async def write(self):
+        """One write transaction, waiting for any other to finish first. Use ledger_write() to touch users."""
+        async with self.write_lock:
+            async with self.transaction():
+                yield
+
+    # --- XP Ledger ---
+    # Every XP change is appended to xp_events (sequential inserts). users is a snapshot
+    # of the ledger, brought up to date in batches by fold_xp_events().
+
+    async def append_xp_events(self, events: list):
+        """Appends (guild_id, user_id, source, amount, actor_id) events. Does not commit."""
+        now = int(time.time())
+        await self.db.executemany(
+            "INSERT INTO xp_events (guild_id, user_id, source, amount, actor_id, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(guild_id, user_id, source, amount, actor_id, now) for guild_id, user_id, source, amount, actor_id in events]
+        )
+
+    async def fold_xp_events(self) -> int:
+        """
+        Adds every event not compacted yet to users in one grouped UPSERT. Levels only go up here,
+        like in on_message; callers that lower XP set the level themselves.
+        Must run inside ledger_write(). Returns how many members were updated.
+        """
+        async with self.db.execute("SELECT compacted_through FROM xp_ledger_state WHERE id = 1") as cursor:
+            start = (await cursor.fetchone())['compacted_through']
+        async with self.db.execute("SELECT MAX(id) FROM xp_events") as cursor:
+            end = (await cursor.fetchone())[0] or 0
+        if end <= start:
             return 0
 
-    async def admin_set_level(self, user_id: int, guild_id: int, level: int):
+        cursor = await self.db.execute("""
+            INSERT INTO users (user_id, guild_id, xp, level)
+            SELECT user_id, guild_id, SUM(amount), member_level(SUM(amount))
+            FROM xp_events WHERE id > ? AND id <= ?
+            GROUP BY guild_id, user_id
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET xp = xp + excluded.xp, level = MAX(level, member_level(xp + excluded.xp))
+        """, (start, end))
+        folded = cursor.rowcount
+
+        # Roll chat XP up into the time buckets of the periodic leaderboards (sync, admin
+        # and import XP only count towards the all-time leaderboard)
+        for period in LEADERBOARD_PERIODS:
+            await self.db.execute(f"""
+                INSERT INTO xp_buckets (guild_id, period, bucket_start, user_id, xp)
+                SELECT guild_id, ?, {bucket_start_sql(period, 'created_at')} AS bucket, user_id, SUM(amount)
+                FROM xp_events WHERE id > ? AND id <= ? AND source = 'message'
+                GROUP BY guild_id, bucket, user_id
+                ON CONFLICT(guild_id, period, bucket_start, user_id) DO UPDATE SET xp = xp + excluded.xp
+            """, (period, start, end))
+
+        await self.db.execute("UPDATE xp_ledger_state SET compacted_through = ? WHERE id = 1", (end,))
+        return folded
+
+    @asynccontextmanager
+    async def ledger_write(self):
+        """
+        Write transaction for anything touching users directly: pending XP is flushed and the
+        ledger folded first, and whatever the block appends is folded before the commit.
+        BEGIN IMMEDIATE takes the write lock up front, so two clusters never fold the same events.
+        """
+        await self.flush_xp()
+        async with self.write():
+            await self.fold_xp_events()
+            yield
+            await self.fold_xp_events()
+
+    async def compact_xp(self):
+        """
+        Folds the ledger into users. Writes, so it's for the compactor and admin paths only:
+        read-only paths read the snapshot as it is (at most XP_COMPACT_INTERVAL behind).
+        """
+        async with self.ledger_write():
+            pass
+
+    async def squash_xp_history(self, days: int) -> int:
+        """
+        Replaces events older than `days` with one opening balance per member, so the ledger
+        stays bounded but still adds up to users.xp. Returns how many events were removed.
+
+        Only members with more than one old event are touched: an opening balance on its own
+        is already squashed, so running this again does nothing until new events age past the cutoff.
+        """
+        cutoff = int(time.time()) - days * 86400
+        async with self.ledger_write():
+            # Everything is folded at this point, so the new opening rows are marked as compacted too.
+            # INDEXED BY: without statistics SQLite prefers walking the primary key or idx_xp_events_member,
+            # i.e. the whole table, over the range of old events.
+            async with self.db.execute("SELECT MAX(id) FROM xp_events INDEXED BY idx_xp_events_created WHERE created_at < ?", (cutoff,)) as cursor:
+                last_old = (await cursor.fetchone())[0]
+            removed = 0
+            if last_old is not None:
+                await self.db.execute("CREATE TEMP TABLE IF NOT EXISTS squash_members (guild_id INTEGER, user_id INTEGER, PRIMARY KEY (guild_id, user_id))")
+                await self.db.execute("DELETE FROM temp.squash_members")
+                await self.db.execute("""
+                    INSERT INTO temp.squash_members (guild_id, user_id)
+                    SELECT guild_id, user_id FROM xp_events INDEXED BY idx_xp_events_created WHERE created_at < ? AND id <= ?
+                    GROUP BY guild_id, user_id HAVING COUNT(*) > 1
+                """, (cutoff, last_old))
+                # Old events of those members. CROSS JOIN keeps squash_members as the outer loop,
+                # so each member's events are found through idx_xp_events_member.
+                old_events = """
+                    FROM temp.squash_members s CROSS JOIN xp_events e ON e.guild_id = s.guild_id AND e.user_id = s.user_id
+                    WHERE e.created_at < ? AND e.id <= ?
+                """
+                await self.db.execute(f"""
+                    INSERT INTO xp_events (guild_id, user_id, source, amount, created_at)
+                    SELECT e.guild_id, e.user_id, 'opening', SUM(e.amount), MIN(e.created_at) {old_events}
+                    GROUP BY e.guild_id, e.user_id HAVING SUM(e.amount) != 0
+                """, (cutoff, last_old))
+                cursor = await self.db.execute(f"DELETE FROM xp_events WHERE id IN (SELECT e.id {old_events})", (cutoff, last_old))
+                removed = cursor.rowcount
+                await self.db.execute("UPDATE xp_ledger_state SET compacted_through = (SELECT MAX(id) FROM xp_events) WHERE id = 1")
+        self.last_history_squash = time.time()
+        return removed
+
+    async def prune_xp_buckets(self) -> int:
+        """Deletes leaderboard buckets older than BUCKET_RETENTION. Returns how many rows were removed."""
+        now = int(time.time())
+        removed = 0
+        async with self.write():
+            for period, keep in BUCKET_RETENTION.items():
+                cursor = await self.db.execute("DELETE FROM xp_buckets WHERE period = ? AND bucket_start < ?", (period, now - keep))
+                removed += cursor.rowcount
+        self.last_bucket_prune = now
+        return removed
+
+    @tasks.loop(seconds=XP_COMPACT_INTERVAL)
+    async def compact_loop(self):
+        try:
+            await self.compact_xp()
+            if time.time() - self.last_bucket_prune >= BUCKET_PRUNE_INTERVAL:
+                await self.prune_xp_buckets()
+            if XP_HISTORY_DAYS and time.time() - self.last_history_squash >= XP_SQUASH_INTERVAL:
+                await self.squash_xp_history(XP_HISTORY_DAYS)
+        except Exception as e:
+            print(f"Levels Cog: XP compaction failed, will retry. ({e})")
+
+    async def get_xp_history(self, guild_id: int, user_id: int, limit: int = 10) -> list:
+        """Latest ledger events for a member, newest first (chat XP shows up once flushed, within XP_FLUSH_INTERVAL)."""
+        return await self.read_db.fetchall("""
+            SELECT source, amount, actor_id, created_at FROM xp_events
+            WHERE guild_id = ? AND user_id = ? ORDER BY id DESC LIMIT ?
+        """, (guild_id, user_id, limit))
+
+    async def load_rankings(self):
+        """Rebuilds the in-memory ranking index from the users table (only guilds on our shards)."""
+        condition, params = sharding.guild_filter_sql(self.bot)
+        async with self.db.execute(f"SELECT guild_id, user_id, xp, level FROM users WHERE {condition}", params) as cursor:
+            rows = await cursor.fetchall()
+        self.rankings.load((r['guild_id'], r['user_id'], r['xp'], r['level']) for r in rows)
+
+    async def fetch_leaderboard_page(self, guild_id: int, after: tuple = None, before: tuple = None, limit: int = LEADERBOARD_PAGE_SIZE, period: str = None):
+        """
+        Keyset pagination over (xp DESC, user_id ASC), served by idx_users_guild_xp,
+        or by idx_xp_buckets_rank inside the current bucket when `period` is given.
+        after/before are the (xp, user_id) of the last/first row of the current page.
+        Returns ([(user_id, xp, level)], has_more) where has_more is for the direction we moved in.
+
+        Only reads (from the reader pool): the snapshot is used as it is, so chat XP shows up
+        once compacted, at most XP_COMPACT_INTERVAL seconds later.
+        """
+        if period is None:
+            source = "SELECT user_id, xp, level FROM users WHERE guild_id = ?"
+            source_params = (guild_id,)
+        else:
+            source = f"""
+                SELECT user_id, xp, NULL AS level FROM xp_buckets
+                WHERE guild_id = ? AND period = ? AND bucket_start = {bucket_start_sql(period, '?')}
+            """
+            source_params = (guild_id, period, int(time.time()))
+
+        if after is not None:
+            query = f"""
+                {source} AND xp <= ? AND (xp < ? OR user_id > ?)
+                ORDER BY xp DESC, user_id ASC
+                LIMIT ?
+            """
+            params = (*source_params, after[0], after[0], after[1], limit + 1)
+        elif before is not None:
+            # Walk backwards from the first row, then flip the result back into display order
+            query = f"""
+                {source} AND xp >= ? AND (xp > ? OR user_id < ?)
+                ORDER BY xp ASC, user_id DESC
+                LIMIT ?
+            """
+            params = (*source_params, before[0], before[0], before[1], limit + 1)
+        else:
+            query = f"""
+                {source}
+                ORDER BY xp DESC, user_id ASC
+                LIMIT ?
+            """
+            params = (*source_params, limit + 1)
+
+        rows = [(r['user_id'], r['xp'], r['level']) for r in await self.read_db.fetchall(query, params)]
+
+        # We fetched one extra row just to know whether another page exists
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before is not None:
+            rows.reverse()
+        return rows, has_more
+
+    def render_announcements(self, events: list) -> list:
+        """
+        Turns a channel's queued events into message lines.
+        events: ("level_up", mention, level) / ("reward", mention, [role names]) / ("notice", text)
+        """
+        level_ups = {} # mention -> highest level reached in this batch
+        rewards = {} # mention -> role names
+        notices = []
+        for event in events:
+            if event[0] == "level_up":
+                level_ups[event[1]] = max(event[2], level_ups.get(event[1], 0))
+            elif event[0] == "reward":
+                rewards.setdefault(event[1], []).extend(event[2])
+            elif event[1] not in notices:
+                notices.append(event[1])
+
+        lines = []
+        if len(level_ups) == 1:
+            mention, level = next(iter(level_ups.items()))
+            lines.append(f"🎉 {mention} has leveled up to **Level {level}**!")
+        elif level_ups:
+            names = [f"{mention} (**Level {level}**)" for mention, level in level_ups.items()]
+            lines.append(f"🎉 {join_names(names)} leveled up!")
+
+        for mention, role_names in rewards.items():
+            names = ", ".join(f"**{name}**" for name in role_names)
+            lines.append(f"🎁 {mention} has been awarded the {names} role{'s' if len(role_names) > 1 else ''}!")
+
+        return lines + notices
+
+    # --- Public Admin Methods (API) ---
+
+    async def admin_give_xp(self, user_id: int, guild_id: int, amount: int, actor_id: int = None):
+        """Adds (or removes) XP and returns the new total XP. `actor_id` is recorded in the ledger."""
+        old_level = self.get_known_level(guild_id, user_id)
+        async with self.ledger_write():
+            await self.append_xp_events([(guild_id, user_id, "admin", amount, actor_id)])
+            await self.fold_xp_events()
+
+            async with self.db.execute("SELECT xp FROM users WHERE user_id = ? AND guild_id = ?", (user_id, guild_id)) as cursor:
+                row = await cursor.fetchone()
+            new_xp = row['xp']
+            # Taking XP away can lower the level, which folding never does
+            correct_level = self.calculate_level_from_xp(new_xp)
+            await self.db.execute("UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?", (correct_level, user_id, guild_id))
+
+        self.set_known_totals(guild_id, user_id, new_xp, correct_level)
+        await self.grant_rewards_by_id(guild_id, user_id, old_level, correct_level)
+        return new_xp
+
+    async def admin_set_level(self, user_id: int, guild_id: int, level: int, actor_id: int = None):
         """Sets a user's level and resets XP to minimum for that level."""
+        old_level = self.get_known_level(guild_id, user_id)
         required_xp = self.calculate_xp_for_level(level)
-            
-        await self.db.execute("""
-            INSERT INTO users (user_id, guild_id, xp, level)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET xp = ?, level = ?
-        """, (user_id, guild_id, required_xp, level, required_xp, level))
-        await self.db.commit()
+
+        async with self.ledger_write():
+            # Recorded as the difference to the current XP, so the ledger still adds up
+            async with self.db.execute("SELECT xp FROM users WHERE user_id = ? AND guild_id = ?", (user_id, guild_id)) as cursor:
+                row = await cursor.fetchone()
+            current_xp = row['xp'] if row else 0
+            await self.append_xp_events([(guild_id, user_id, "admin", required_xp - current_xp, actor_id)])
+            await self.fold_xp_events()
+            await self.db.execute("UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?", (level, user_id, guild_id))
+
+        self.set_known_totals(guild_id, user_id, required_xp, level)
+        await self.grant_rewards_by_id(guild_id, user_id, old_level, level)
         return required_xp
 
     async def admin_sync_xp(self, channel, limit: int = 1000) -> int:
         """Scans channel history and backfills XP. Returns count of users updated."""
-        user_counts = {}
-        async for message in channel.history(limit=limit):
-            if message.author.bot: continue
-            uid = message.author.id
-            user_counts[uid] = user_counts.get(uid, 0) + 1
-            
-        if not user_counts: return 0
+        stats = await self.admin_backfill_xp(channel.guild, [channel], limit)
+        return len(stats["users"])
+
+    async def admin_backfill_xp(self, guild, channels, limit: int = 1000, progress=None) -> dict:
+        """
+        Backfills XP from the history of several channels at once (BACKFILL_CONCURRENCY at a time).
+
+        - Messages are streamed oldest-first starting after each channel's checkpoint, so reruns
+          only pick up new messages and never count the same message twice.
+        - XP follows the guild's rate and cooldown using message timestamps, like live chat would.
+        - Every BACKFILL_BATCH_SIZE messages the XP and the channel checkpoint are written in one transaction.
+        - `limit` caps how many messages each channel scans per run (None = everything).
+        - `progress(stats)` is awaited after each batch, if given.
+        """
+        settings = self.get_guild_settings(guild.id)
+        xp_rate = settings["xp_rate"]
+        xp_cooldown = settings["xp_cooldown"]
+
+        awarded = {} # user_id -> sorted timestamps that earned XP during this run
+        level_changes = {} # user_id -> [level before, level after]
+        stats = {"channels": len(channels), "channels_done": 0, "messages": 0, "xp": 0, "users": set(), "failed": []}
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+        async def scan(channel):
+            async with semaphore:
+                checkpoint = await self.get_sync_checkpoint(channel.id)
+                after = discord.Object(id=checkpoint) if checkpoint else None
+                pending = {} # user_id -> XP not written yet
+                last_id = checkpoint
+                scanned = 0
+
+                try:
+                    async for message in channel.history(limit=limit, after=after, oldest_first=True):
+                        last_id = message.id
+                        scanned += 1
+                        stats["messages"] += 1
+
+                        if not message.author.bot and not message.webhook_id:
+                            times = awarded.setdefault(message.author.id, [])
+                            if self.claim_backfill_xp(times, message.created_at.timestamp(), xp_cooldown):
+                                pending[message.author.id] = pending.get(message.author.id, 0) + xp_rate
+
+                        if scanned % BACKFILL_BATCH_SIZE == 0:
+                            await self.write_backfill_batch(guild.id, channel.id, pending, last_id, stats, level_changes)
+                            pending = {}
+                            if progress:
+                                await progress(stats)
+                except discord.HTTPException as e:
+                    # Missing access etc. Keep what we got so far, the checkpoint lets a rerun resume.
+                    stats["failed"].append(channel.id)
+                    print(f"Levels Cog: Backfill of channel {channel.id} stopped early. ({e})")
+
+                if last_id != checkpoint:
+                    await self.write_backfill_batch(guild.id, channel.id, pending, last_id, stats, level_changes)
+                stats["channels_done"] += 1
+                if progress:
+                    await progress(stats)
+
+        await self.flush_xp()
+        await asyncio.gather(*(scan(channel) for channel in channels))
+
+        # Grant every reward crossed by the backfill (one add_roles call per user)
+        for user_id, (old_level, new_level) in level_changes.items():
+            await self.grant_rewards_by_id(guild.id, user_id, old_level, new_level)
+        return stats
+
+    def claim_backfill_xp(self, times: list, timestamp: float, cooldown: int) -> bool:
+        """
+        Returns True (and records the timestamp) if a message at `timestamp` is outside the
+        cooldown of every message that already earned XP. Channels are scanned concurrently,
+        so messages don't arrive in global order and we check both neighbours.
+        """
+        i = bisect_left(times, timestamp)
+        if i > 0 and timestamp - times[i - 1] < cooldown:
+            return False
+        if i < len(times) and times[i] - timestamp < cooldown:
+            return False
+        times.insert(i, timestamp)
+        return True
+
+    async def get_sync_checkpoint(self, channel_id: int):
+        """Last message ID backfilled for a channel, or None if it was never synced."""
+        async with self.db.execute("SELECT last_message_id FROM sync_checkpoints WHERE channel_id = ?", (channel_id,)) as cursor:
+            row = await cursor.fetchone()
+            return row['last_message_id'] if row else None
+
+    async def write_backfill_batch(self, guild_id: int, channel_id: int, pending: dict, last_message_id: int, stats: dict, level_changes: dict):
+        """Writes one backfill batch: ledger events, the folded totals and the channel checkpoint, in a single transaction."""
+        new_totals = {} # user_id -> (xp, level)
+        async with self.ledger_write():
+            if pending:
+                await self.append_xp_events([(guild_id, user_id, "backfill", amount, None) for user_id, amount in pending.items()])
+                await self.fold_xp_events()
+
+                user_ids = list(pending)
+                for i in range(0, len(user_ids), 500):
+                    chunk = user_ids[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    async with self.db.execute(f"SELECT user_id, xp, level FROM users WHERE guild_id = ? AND user_id IN ({placeholders})", (guild_id, *chunk)) as cursor:
+                        async for row in cursor:
+                            new_totals[row['user_id']] = (row['xp'], row['level'])
 
-        for user_id, count in user_counts.items():
-            xp_to_add = count * 10
             await self.db.execute("""
-                INSERT INTO users (user_id, guild_id, xp, level)
-                VALUES (?, ?, ?, 1)
-                ON CONFLICT(user_id, guild_id) DO UPDATE SET xp = xp + ?
-            """, (user_id, channel.guild.id, xp_to_add, xp_to_add))
-            
-            # Recalculate level to ensure it matches new XP
-            async with self.db.execute("SELECT xp FROM users WHERE user_id = ? AND guild_id = ?", (user_id, channel.guild.id)) as cursor:
+                INSERT INTO sync_checkpoints (channel_id, guild_id, last_message_id)
+                VALUES (?, ?, ?)
+                ON CONFLICT(channel_id) DO UPDATE SET last_message_id = excluded.last_message_id
+            """, (channel_id, guild_id, last_message_id))
+
+        for user_id, (xp, level) in new_totals.items():
+            change = level_changes.setdefault(user_id, [self.get_known_level(guild_id, user_id), level])
+            change[1] = level
+            self.set_known_totals(guild_id, user_id, xp, level)
+            stats["users"].add(user_id)
+        stats["xp"] += sum(pending.values())
+
+    async def admin_recalculate_user(self, user_id: int, guild_id: int):
+        """Recalculates one member's level from their XP. Returns (xp, level), or None if they have no data."""
+        async with self.ledger_write():
+            async with self.db.execute("SELECT xp FROM users WHERE user_id = ? AND guild_id = ?", (user_id, guild_id)) as cursor:
                 row = await cursor.fetchone()
-                if row:
-                    new_xp = row['xp']
-                    # Formula: MEE6
-                    correct_level = self.calculate_level_from_xp(new_xp)
-                    await self.db.execute("UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?", (correct_level, user_id, channel.guild.id))
+            if not row:
+                return None
+            xp = row['xp']
+            level = self.calculate_level_from_xp(xp)
+            await self.db.execute("UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?", (level, user_id, guild_id))
+
+        self.set_known_totals(guild_id, user_id, xp, level)
+        return xp, level
+
+    async def admin_recalculate_all(self, guild_id: int) -> int:
+        """
+        Recalculates every member's level from their XP in one UPDATE (uses the member_level SQL function).
+        Returns how many levels changed.
+        """
+        async with self.ledger_write():
+            cursor = await self.db.execute(
+                "UPDATE users SET level = member_level(xp) WHERE guild_id = ? AND level != member_level(xp)",
+                (guild_id,)
+            )
+            changed = cursor.rowcount
+            if changed:
+                await self.reload_guild(guild_id)
+        return changed
+
+    async def admin_reset_all(self, guild_id: int, actor_id: int = None) -> int:
+        """
+        Resets every member's XP to the base requirement of their current level.
+        One admin event per member is appended by a single INSERT ... SELECT and folded in.
+        Returns how many members changed.
+        """
+        async with self.ledger_write():
+            cursor = await self.db.execute("""
+                INSERT INTO xp_events (guild_id, user_id, source, amount, actor_id, created_at)
+                SELECT guild_id, user_id, 'admin', xp_for_level(level) - xp, ?, ?
+                FROM users WHERE guild_id = ? AND xp != xp_for_level(level)
+            """, (actor_id, int(time.time()), guild_id))
+            changed = cursor.rowcount
+            if changed:
+                await self.fold_xp_events()
+                await self.reload_guild(guild_id)
+        return changed
+
+    async def admin_rebuild_from_ledger(self, guild_id: int) -> int:
+        """
+        Recomputes every member's XP by replaying the ledger, then their level from that XP.
+        Repairs a snapshot that drifted (e.g. after manual SQL edits). Returns how many members changed.
+        """
+        async with self.ledger_write():
+            # Served by idx_xp_events_member, one index range per member
+            replayed = "(SELECT COALESCE(SUM(amount), 0) FROM xp_events e WHERE e.guild_id = users.guild_id AND e.user_id = users.user_id)"
+            cursor = await self.db.execute(
+                f"UPDATE users SET xp = {replayed} WHERE guild_id = ? AND xp != {replayed}",
+                (guild_id,)
+            )
+            changed = cursor.rowcount
+            await self.db.execute(
+                "UPDATE users SET level = member_level(xp) WHERE guild_id = ? AND level != member_level(xp)",
+                (guild_id,)
+            )
+            if changed:
+                await self.reload_guild(guild_id)
+        return changed
+
+    # --- Import / Export ---
+
+    async def admin_export_guild(self, guild_id: int, path: str, fmt: str) -> int:
+        """
+        Streams a guild's members to `path` as CSV or JSONL, highest XP first, a chunk at a time
+        (file writes happen in a worker thread). Returns the number of rows written.
+        Reads the users snapshot as it is, so the last XP_COMPACT_INTERVAL seconds of chat XP may be missing.
+        """
+        with open(path, "w", encoding="utf-8", newline="") as fh:
+            writer = levels_io.RowWriter(fh, fmt)
+            async with self.read_db.acquire() as db:
+                # Walks idx_users_guild_xp, no sort needed
+                async with db.execute("SELECT user_id, xp, level FROM users WHERE guild_id = ? ORDER BY xp DESC, user_id", (guild_id,)) as cursor:
+                    while rows := await cursor.fetchmany(levels_io.CHUNK_SIZE):
+                        await asyncio.to_thread(writer.write_rows, [tuple(row) for row in rows])
+        return writer.count
+
+    async def admin_import_guild(self, guild_id: int, path: str, fmt: str, replace: bool = True, actor_id: int = None) -> dict:
+        """
+        Imports (user_id, xp) rows from a CSV, JSONL or JSON file in a single transaction.
+        With `replace` each member's XP becomes the file's value, otherwise it is added on top.
+
+        The file is parsed in chunks in a worker thread and staged with executemany into a temp
+        table. The XP changes are then appended to the ledger as 'import' events with one
+        INSERT ... SELECT, folded into users and the levels recomputed. A bad row rolls back everything.
+        Returns {"rows": rows in the file, "changed": members whose XP changed}.
+        """
+        delta = "i.xp - COALESCE(u.xp, 0)" if replace else "i.xp"
+        with open(path, encoding="utf-8-sig", newline="") as fh:
+            chunks = levels_io.iter_chunks(fh, fmt)
+            async with self.ledger_write():
+                await self.db.execute("CREATE TEMP TABLE IF NOT EXISTS import_rows (user_id INTEGER PRIMARY KEY, xp INTEGER)")
+                await self.db.execute("DELETE FROM temp.import_rows")
+                # A user listed twice keeps their last row
+                while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                    await self.db.executemany("INSERT OR REPLACE INTO temp.import_rows (user_id, xp) VALUES (?, ?)", chunk)
+
+                # Folding only raises levels, so remember who is getting less XP than they have
+                await self.db.execute("CREATE TEMP TABLE IF NOT EXISTS import_lowered (user_id INTEGER PRIMARY KEY)")
+                await self.db.execute("DELETE FROM temp.import_lowered")
+                if replace:
+                    await self.db.execute("""
+                        INSERT INTO temp.import_lowered (user_id)
+                        SELECT i.user_id FROM temp.import_rows i JOIN users u ON u.guild_id = ? AND u.user_id = i.user_id
+                        WHERE i.xp < u.xp
+                    """, (guild_id,))
+
+                cursor = await self.db.execute(f"""
+                    INSERT INTO xp_events (guild_id, user_id, source, amount, actor_id, created_at)
+                    SELECT ?, i.user_id, 'import', {delta}, ?, ?
+                    FROM temp.import_rows i LEFT JOIN users u ON u.guild_id = ? AND u.user_id = i.user_id
+                    WHERE {delta} != 0
+                """, (guild_id, actor_id, int(time.time()), guild_id))
+                changed = cursor.rowcount
+                await self.fold_xp_events()
+
+                await self.db.execute(
+                    "UPDATE users SET level = member_level(xp) WHERE guild_id = ? AND user_id IN (SELECT user_id FROM temp.import_lowered)",
+                    (guild_id,)
+                )
 
-        await self.db.commit()
-        return len(user_counts)
+                async with self.db.execute("SELECT COUNT(*) FROM temp.import_rows") as count_cursor:
+                    rows = (await count_cursor.fetchone())[0]
+                await self.db.execute("DELETE FROM temp.import_rows")
+                await self.db.execute("DELETE FROM temp.import_lowered")
+                if changed:
+                    await self.reload_guild(guild_id)
+        return {"rows": rows, "changed": changed}
+
+    async def reload_guild(self, guild_id: int):
+        """
+        Re-reads one guild's ranking index from the DB after a bulk change.
+        Call it inside ledger_write() once the ledger is folded: the write lock keeps flush_xp
+        from moving pending XP into unfolded events between reading users and pending_xp.
+        """
+        async with self.db.execute("SELECT user_id, xp, level FROM users WHERE guild_id = ?", (guild_id,)) as cursor:
+            rows = await cursor.fetchall()
+        # Chat XP that isn't flushed yet isn't in the DB, keep counting it
+        pending = {user_id: amount for (g, user_id), amount in self.pending_xp.items() if g == guild_id}
+        entries = [(r['user_id'], r['xp'] + pending.pop(r['user_id'], 0), r['level']) for r in rows]
+        # Members whose only XP is still pending have no row yet, keep their in-memory totals
+        old = self.rankings.guild(guild_id)
+        entries += [(user_id, *old.get(user_id)) for user_id in pending if old.get(user_id)]
+        self.rankings.guilds[guild_id] = GuildRanking(entries)
 
     async def admin_add_reward(self, guild_id: int, level: int, role_id: int):
         """Adds a level reward."""
-        await self.db.execute("""
-            INSERT INTO level_rewards (guild_id, level, role_id)
-            VALUES (?, ?, ?)
-            ON CONFLICT(guild_id, level) DO UPDATE SET role_id = ?
-        """, (guild_id, level, role_id, role_id))
-        await self.db.commit()
+        replaced = self.reward_cache.get(guild_id, {}).get(level)
+        async with self.write():
+            await self.db.execute("""
+                INSERT INTO level_rewards (guild_id, level, role_id)
+                VALUES (?, ?, ?)
+                ON CONFLICT(guild_id, level) DO UPDATE SET role_id = ?
+            """, (guild_id, level, role_id, role_id))
+            await self.db.execute("DELETE FROM retired_reward_roles WHERE guild_id = ? AND role_id = ?", (guild_id, role_id))
+        self.reward_cache.setdefault(guild_id, {})[level] = role_id
+        if replaced and replaced != role_id:
+            await self.retire_reward_role(guild_id, replaced)
 
     async def admin_remove_reward(self, guild_id: int, level: int):
         """Removes a level reward."""
-        await self.db.execute("DELETE FROM level_rewards WHERE guild_id = ? AND level = ?", (guild_id, level))
-        await self.db.commit()
+        async with self.write():
+            await self.db.execute("DELETE FROM level_rewards WHERE guild_id = ? AND level = ?", (guild_id, level))
+        role_id = self.reward_cache.get(guild_id, {}).pop(level, None)
+        if role_id:
+            await self.retire_reward_role(guild_id, role_id)
+
+    async def retire_reward_role(self, guild_id: int, role_id: int):
+        """Remembers a role that is no longer a reward, so the next reconciliation takes it back."""
+        if role_id in self.reward_cache.get(guild_id, {}).values():
+            return # Still the reward for another level
+        async with self.write():
+            await self.db.execute("INSERT OR IGNORE INTO retired_reward_roles (guild_id, role_id) VALUES (?, ?)", (guild_id, role_id))
+
+    # --- Reward Reconciliation ---
+
+    def diff_reward_roles(self, member: discord.Member, retired: set) -> tuple:
+        """
+        Compares a member's roles with the rewards implied by their level.
+        Returns (role IDs to add, role IDs to remove).
+        """
+        rewards = self.reward_cache.get(member.guild.id, {})
+        level = self.get_known_level(member.guild.id, member.id)
+
+        desired = {role_id for reward_level, role_id in rewards.items() if reward_level <= level}
+        managed = set(rewards.values()) | retired
+        current = {role.id for role in member.roles}
+
+        to_add = {role_id for role_id in desired - current if member.guild.get_role(role_id)}
+        to_remove = (managed - desired) & current
+        return to_add, to_remove
+
+    async def admin_reconcile_rewards(self, guild: discord.Guild, progress=None) -> dict:
+        """
+        Brings every cached member's reward roles in line with their level.
+
+        - Members are walked in user ID order and the position is checkpointed in
+          reward_reconcile_jobs, so a restart resumes instead of starting over.
+        - Each member needing changes gets ONE member.edit call, spaced by RECONCILE_EDIT_INTERVAL
+          so we stay under the member-edit rate limit (discord.py still handles any 429s).
+        - `progress(stats)` is awaited at every checkpoint, if given.
+        """
+        async with self.db.execute("SELECT last_user_id FROM reward_reconcile_jobs WHERE guild_id = ?", (guild.id,)) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            async with self.write():
+                await self.db.execute("INSERT OR IGNORE INTO reward_reconcile_jobs (guild_id, last_user_id) VALUES (?, 0)", (guild.id,))
+        start_after = row['last_user_id'] if row else 0
+
+        async with self.db.execute("SELECT role_id FROM retired_reward_roles WHERE guild_id = ?", (guild.id,)) as cursor:
+            retired = {r['role_id'] for r in await cursor.fetchall()}
+
+        members = sorted((m for m in guild.members if not m.bot and m.id > start_after), key=lambda m: m.id)
+        stats = {"members": len(members), "checked": 0, "edited": 0, "failed": 0}
+
+        for member in members:
+            to_add, to_remove = self.diff_reward_roles(member, retired)
+            if to_add or to_remove:
+                roles = [r for r in member.roles if not r.is_default() and r.id not in to_remove]
+                roles += [guild.get_role(role_id) for role_id in to_add]
+                try:
+                    await member.edit(roles=roles, reason="Level reward sync")
+                    stats["edited"] += 1
+                except discord.HTTPException as e:
+                    stats["failed"] += 1
+                    print(f"Levels Cog: Could not sync reward roles for {member.id}. ({e})")
+                await asyncio.sleep(RECONCILE_EDIT_INTERVAL)
+
+            stats["checked"] += 1
+            if stats["checked"] % RECONCILE_CHECKPOINT_EVERY == 0:
+                async with self.write():
+                    await self.db.execute("UPDATE reward_reconcile_jobs SET last_user_id = ? WHERE guild_id = ?", (member.id, guild.id))
+                if progress:
+                    await progress(stats)
+
+        # Finished. Retired roles are only forgotten once every member was edited successfully,
+        # otherwise the next run still knows to take them back.
+        async with self.write():
+            await self.db.execute("DELETE FROM reward_reconcile_jobs WHERE guild_id = ?", (guild.id,))
+            if not stats["failed"]:
+                await self.db.execute("DELETE FROM retired_reward_roles WHERE guild_id = ?", (guild.id,))
+        return stats
+
+    def start_reward_reconcile(self, guild: discord.Guild, progress=None, restart: bool = False, on_finish=None) -> asyncio.Task:
+        """
+        Runs admin_reconcile_rewards in the background (one job per guild).
+        With restart=True a running job is cancelled and the walk starts again from the first member.
+        `on_finish(stats)` is awaited when the job completes (not when it is cancelled).
+        """
+        task = self.reconcile_tasks.get(guild.id)
+        if task and not task.done():
+            if not restart:
+                return task
+            task.cancel()
+
+        async def run():
+            if restart:
+                async with self.write():
+                    await self.db.execute("DELETE FROM reward_reconcile_jobs WHERE guild_id = ?", (guild.id,))
+            try:
+                stats = await self.admin_reconcile_rewards(guild, progress)
+            except Exception as e:
+                print(f"Levels Cog: Reward reconciliation for {guild.id} failed, it resumes on the next run. ({e})")
+                raise
+            if on_finish:
+                await on_finish(stats)
+            return stats
+
+        task = asyncio.create_task(run())
+        self.reconcile_tasks[guild.id] = task
+        return task
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Resume reconciliations interrupted by a restart (needs the member cache, hence on_ready)
+        condition, params = sharding.guild_filter_sql(self.bot)
+        async with self.db.execute(f"SELECT guild_id FROM reward_reconcile_jobs WHERE {condition}", params) as cursor:
+            guild_ids = [r['guild_id'] for r in await cursor.fetchall()]
+        for guild_id in guild_ids:
+            guild = self.bot.get_guild(guild_id)
+            if guild:
+                self.start_reward_reconcile(guild)
 
     async def get_rewards_config(self, guild_id: int):
         """Returns list of dicts {level, role_id}."""
-        async with self.db.execute("SELECT level, role_id FROM level_rewards WHERE guild_id = ? ORDER BY level ASC", (guild_id,)) as cursor:
-            rows = await cursor.fetchall()
-            return [{"level": r['level'], "role_id": r['role_id']} for r in rows]
+        rewards = self.reward_cache.get(guild_id, {})
+        return [{"level": level, "role_id": rewards[level]} for level in sorted(rewards)]
+
+    async def load_reward_cache(self):
+        """Loads every guild's level rewards into memory (only guilds on our shards). Called once at cog_load."""
+        self.reward_cache = {}
+        condition, params = sharding.guild_filter_sql(self.bot)
+        async with self.db.execute(f"SELECT guild_id, level, role_id FROM level_rewards WHERE {condition}", params) as cursor:
+            async for row in cursor:
+                self.reward_cache.setdefault(row['guild_id'], {})[row['level']] = row['role_id']
+
+    def get_rewards_between(self, guild_id: int, old_level: int, new_level: int) -> list:
+        """Role IDs for every reward level crossed going from old_level to new_level."""
+        rewards = self.reward_cache.get(guild_id, {})
+        return [role_id for level, role_id in sorted(rewards.items()) if old_level < level <= new_level]
+
+    def get_known_level(self, guild_id: int, user_id: int) -> int:
+        """The user's current level as tracked by the ranking index (0 if unknown)."""
+        entry = self.rankings.guild(guild_id).get(user_id)
+        return entry[1] if entry else 0
+
+    async def grant_level_rewards(self, member: discord.Member, old_level: int, new_level: int) -> list:
+        """
+        Gives the member every reward role between old_level (exclusive) and new_level (inclusive)
+        in a single add_roles request. Returns the roles that were added.
+        Raises discord.Forbidden / discord.HTTPException like add_roles does.
+        """
+        if new_level <= old_level:
+            return []
+
+        roles = []
+        for role_id in self.get_rewards_between(member.guild.id, old_level, new_level):
+            role = member.guild.get_role(role_id)
+            if role and role not in member.roles and role not in roles:
+                roles.append(role)
+
+        if roles:
+            await member.add_roles(*roles, reason=f"Level reward (Level {new_level})")
+        return roles
+
+    async def grant_rewards_by_id(self, guild_id: int, user_id: int, old_level: int, new_level: int):
+        """Admin-path version of grant_level_rewards: resolves the member from cache and never raises."""
+        if new_level <= old_level:
+            return
+        guild = self.bot.get_guild(guild_id)
+        member = guild.get_member(user_id) if guild else None
+        if not member:
+            return
+        try:
+            await self.grant_level_rewards(member, old_level, new_level)
+        except discord.HTTPException as e:
+            print(f"Levels Cog: Could not grant level rewards to {user_id} in {guild_id}. ({e})")
+
+    async def load_guild_settings(self):
+        """Loads every guild's settings into memory (only guilds on our shards). Called once at cog_load."""
+        self.guild_settings = {}
+        condition, params = sharding.guild_filter_sql(self.bot)
+        async with self.db.execute(f"SELECT guild_id, xp_rate, xp_cooldown FROM guild_settings WHERE {condition}", params) as cursor:
+            async for row in cursor:
+                self.guild_settings[row['guild_id']] = {
+                    "xp_rate": row['xp_rate'] if row['xp_rate'] is not None else 10,
+                    "xp_cooldown": row['xp_cooldown'] if row['xp_cooldown'] is not None else 10,
+                }
+
+    def get_guild_settings(self, guild_id: int) -> dict:
+        """
+        Returns the cached settings for a guild without touching the DB.
+        Guilds without a row get the defaults (10 XP, 10s cooldown), which are cached too.
+        """
+        settings = self.guild_settings.get(guild_id)
+        if settings is None:
+            self.cache_stats["settings_misses"] += 1
+            settings = {"xp_rate": 10, "xp_cooldown": 10}
+            self.guild_settings[guild_id] = settings
+        else:
+            self.cache_stats["settings_hits"] += 1
+        return settings
 
     async def get_guild_xp_rate(self, guild_id: int) -> int:
         """Fetches the XP rate for a guild, defaulting to 10."""
-        async with self.db.execute("SELECT xp_rate FROM guild_settings WHERE guild_id = ?", (guild_id,)) as cursor:
-            row = await cursor.fetchone()
-            return row['xp_rate'] if row else 10
+        return self.get_guild_settings(guild_id)["xp_rate"]
 
     async def set_guild_xp_rate(self, guild_id: int, rate: int):
         """Sets the XP rate for a guild."""
-        await self.db.execute("""
-            INSERT INTO guild_settings (guild_id, xp_rate)
-            VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET xp_rate = ?
-        """, (guild_id, rate, rate))
-        await self.db.commit()
+        async with self.write():
+            await self.db.execute("""
+                INSERT INTO guild_settings (guild_id, xp_rate)
+                VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET xp_rate = ?
+            """, (guild_id, rate, rate))
+        self.get_guild_settings(guild_id)["xp_rate"] = rate
+
+    async def set_guild_cooldown(self, guild_id: int, seconds: int):
+        """Sets the XP cooldown (in seconds) for a guild."""
+        async with self.write():
+            await self.db.execute("""
+                INSERT INTO guild_settings (guild_id, xp_rate, xp_cooldown)
+                VALUES (?, 10, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET xp_cooldown = ?
+            """, (guild_id, seconds, seconds))
+        self.get_guild_settings(guild_id)["xp_cooldown"] = seconds
 
 
     async def cog_load(self):
@@ -166,71 +1063,44 @@ class Levels(commands.Cog):
         Called when the Cog is loaded. We set up the database here.
         This is an Async operation, which is why we use aiosqlite.
         """
-        # Connect to the SQLite database
+        # Connect to the SQLite database (WAL, tuned cache/mmap, see utils/levels_db.py)
         # This creates the file if it doesn't exist.
-        
-        # Ensure directory exists
-        db_dir = os.path.dirname(DB_FILE)
-        if db_dir and not os.path.exists(db_dir):
-            os.makedirs(db_dir)
+        self.db = await levels_db.connect(DB_FILE)
 
-        self.db = await aiosqlite.connect(DB_FILE)
-        
-        # Enable row factory to get results as accessible objects/dicts instead of just tuples
-        self.db.row_factory = aiosqlite.Row
-
-        # Create the table if it doesn't exist
-        # CHECK: We use IF NOT EXISTS so this is safe to run every time.
-        # columns:
-        #   user_id: The Discord User ID (Primary Key - must be unique)
-        #   guild_id: The Server ID (Composite key with user usually, but for simplicity we filter by it)
-        #   xp: Total experience points
-        #   level: Current level
-        await self.db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER,
-                guild_id INTEGER,
-                xp INTEGER DEFAULT 0,
-                level INTEGER DEFAULT 1,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        """)
-        
-        # Create table for level rewards
-        await self.db.execute("""
-            CREATE TABLE IF NOT EXISTS level_rewards (
-                guild_id INTEGER,
-                level INTEGER,
-                role_id INTEGER,
-                PRIMARY KEY (guild_id, level)
-            )
-        """)
-
-        # Create table for guild settings (e.g. XP rate)
-        await self.db.execute("""
-            CREATE TABLE IF NOT EXISTS guild_settings (
-                guild_id INTEGER PRIMARY KEY,
-                xp_rate INTEGER DEFAULT 10,
-                xp_cooldown INTEGER DEFAULT 10
-            )
-        """)
+        # Bring the schema up to date. Each migration runs once and is recorded in schema_version.
+        applied = await levels_db.migrate(self.db)
+        if applied:
+            print(f"Levels Cog: Applied schema migrations {applied}.")
 
-        # Migration: Add xp_cooldown column if it doesn't exist (for existing DBs)
-        try:
-            await self.db.execute("ALTER TABLE guild_settings ADD COLUMN xp_cooldown INTEGER DEFAULT 10")
-        except Exception:
-            pass # Column likely already exists
-        
-        
-        await self.db.commit()
+        # Readers are opened after migrating so they see the final schema
+        self.read_db = await levels_db.ReaderPool.open(DB_FILE, DB_READERS)
         print("Levels Cog: Database connected and table verified.")
 
+        # Fold whatever the ledger got before the last shutdown, so the snapshot is current
+        await self.compact_xp()
+
+        await self.load_guild_settings()
+        await self.load_rankings()
+        await self.load_reward_cache()
+
+        self.flush_loop.start()
+        self.compact_loop.start()
+
     async def cog_unload(self):
-        """Close the database connection when the Cog is unloaded"""
+        """Flush pending XP and close the database connection when the Cog is unloaded"""
+        self.flush_loop.cancel()
+        self.compact_loop.cancel()
+        for task in self.reconcile_tasks.values():
+            task.cancel()
+        await self.announcements.close()
+        if self.read_db:
+            await self.read_db.close()
         if self.db:
+            await self.compact_xp()
             await self.db.close()
 
     @commands.Cog.listener()
+    @metrics.timed("listener_seconds", listener="Levels.on_message")
     async def on_message(self, message):
         """
         Listen to every message to award XP.
@@ -246,95 +1116,67 @@ class Levels(commands.Cog):
         # --- Cooldown Check ---
         now = time.time()
         
-        # Fetch guild cooldown setting
-        xp_cooldown = 10 # Default
-        async with self.db.execute("SELECT xp_cooldown FROM guild_settings WHERE guild_id = ?", (message.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            if row and row['xp_cooldown'] is not None:
-                xp_cooldown = row['xp_cooldown']
+        # Guild settings come from the in-memory cache (no DB query here)
+        settings = self.get_guild_settings(message.guild.id)
+        xp_cooldown = settings["xp_cooldown"]
 
-        last_xp = self.cooldowns.get(message.author.id, 0)
-        if now - last_xp < xp_cooldown:
+        # Starts a new cooldown if the user is not on one already
+        if not self.cooldowns.try_acquire((message.guild.id, message.author.id), xp_cooldown, now):
             return
-            
-        self.cooldowns[message.author.id] = now
         # ----------------------
 
         # 3. Add XP
         # We award customized XP per message (default 10).
-        xp_gain = await self.get_guild_xp_rate(message.guild.id)
-        
-        # SQL: UPSERT (Insert or Update)
-        # We try to Insert the user. If they exist (Conflict on Primary Key), we just Update their XP.
-        cursor = await self.db.execute("""
-            INSERT INTO users (user_id, guild_id, xp, level)
-            VALUES (?, ?, ?, 1)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET xp = xp + ?
-        """, (message.author.id, message.guild.id, xp_gain, xp_gain))
-        
-        # 4. Check for Level Up
-        # Just for efficiency, we only fetch the new values to check level up
-        await self.db.commit()
-        
-        async with self.db.execute("""
-            SELECT xp, level FROM users WHERE user_id = ? AND guild_id = ?
-        """, (message.author.id, message.guild.id)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                current_xp = row['xp']
-                current_level = row['level']
-                
-                # Check actual level based on XP
-                calc_level = self.calculate_level_from_xp(current_xp)
-                
-                if calc_level > current_level:
-                    await self.db.execute("UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?", (calc_level, message.author.id, message.guild.id))
-                    await self.db.commit()
-                    
-                    await message.channel.send(f"🎉 {message.author.mention} has leveled up to **Level {calc_level}**!")
-
-                    # Check for Role Rewards
-                    async with self.db.execute("SELECT role_id FROM level_rewards WHERE guild_id = ? AND level = ?", (message.guild.id, calc_level)) as cursor:
-                        reward_row = await cursor.fetchone()
-                        if reward_row:
-                            role_id = reward_row['role_id']
-                            role = message.guild.get_role(role_id)
-                            if role:
-                                try:
-                                    await message.author.add_roles(role)
-                                    await message.channel.send(f"🎁 You've been awarded the **{role.name}** role!")
-                                except discord.Forbidden:
-                                    await message.channel.send("⚠️ I tried to give you a reward role, but I don't have permission! Please check my role hierarchy.")
-                                except discord.HTTPException:
-                                    pass # Ignore other errors for now
+        xp_gain = settings["xp_rate"]
+
+        # Write-behind: the XP is applied to the ranking index (the in-memory copy of every
+        # member's XP and level) right away and queued for the next batched flush
+        # instead of being committed per message.
+        ranking = self.rankings.guild(message.guild.id)
+        # New users start at level 1, same as the users table default
+        current_xp, current_level = ranking.get(message.author.id) or (0, 1)
+        new_xp = current_xp + xp_gain
+
+        # 4. Check for Level Up (in memory)
+        calc_level = self.calculate_level_from_xp(new_xp)
+        ranking.update(message.author.id, new_xp, max(calc_level, current_level))
+
+        key = (message.guild.id, message.author.id)
+        self.pending_xp[key] = self.pending_xp.get(key, 0) + xp_gain
+        if len(self.pending_xp) >= XP_FLUSH_THRESHOLD:
+            await self.flush_xp()
+
+        if calc_level > current_level:
+            # Announcements are queued, not awaited, so XP processing never waits on Discord
+            self.announcements.push(message.channel, ("level_up", message.author.mention, calc_level))
+
+            # Check for Role Rewards (every level crossed, from the in-memory cache)
+            try:
+                roles = await self.grant_level_rewards(message.author, current_level, calc_level)
+                if roles:
+                    self.announcements.push(message.channel, ("reward", message.author.mention, [role.name for role in roles]))
+            except discord.Forbidden:
+                self.announcements.push(message.channel, ("notice", "⚠️ I tried to give a reward role, but I don't have permission! Please check my role hierarchy."))
+            except discord.HTTPException:
+                pass # Ignore other errors for now
 
     # --- Commands ---
 
     @app_commands.command(name="rank", description="Check your current rank and XP")
     async def rank(self, interaction: discord.Interaction, member: discord.Member = None):
         """
-        Fetch data from SQLite and display it.
+        Read the member's stats and position from the in-memory ranking index.
         """
         target = member or interaction.user
-        
-        async with self.db.execute("""
-            SELECT xp, level FROM users WHERE user_id = ? AND guild_id = ?
-        """, (target.id, interaction.guild.id)) as cursor:
-            row = await cursor.fetchone()
+        ranking = self.rankings.guild(interaction.guild.id)
+        row = ranking.get(target.id)
             
         if row:
-            xp = row['xp']
-            level = row['level']
+            xp, level = row
             
             # Show progress to next level
-            # Calculate XP needed for NEXT level (step cost)
-            step_cost = self.get_xp_for_next_level(level)
-            
-            # Calculate Total XP at start of current level
-            current_level_start_xp = self.get_total_xp_for_level(level)
-            
-            # Calculate XP gained WITHIN this level
-            xp_in_this_level = xp - current_level_start_xp
+            # XP gained WITHIN this level, and the XP needed for NEXT level (step cost)
+            xp_in_this_level, step_cost = level_curve.level_progress(xp, level)
             
             # Progress Bar Calculation
             # Constraint: 0 <= percent <= 1
@@ -352,9 +1194,19 @@ class Levels(commands.Cog):
             
             embed.add_field(name="Level", value=str(level), inline=True)
             embed.add_field(name="XP Progress", value=f"{xp_in_this_level} / {step_cost}", inline=True)
+            embed.add_field(name="Rank", value=f"#{ranking.rank_of(target.id)} of {len(ranking)}", inline=True)
             
             # Progress Bar Field
             embed.add_field(name="Progress", value=f"`{bar}` {int(progress_percent * 100)}%", inline=False)
+
+            # Neighbors Field (2 above, 2 below)
+            nearby = ""
+            for position, user_id, user_xp, user_level in ranking.around(target.id, 2):
+                other = interaction.guild.get_member(user_id)
+                name = other.display_name if other else f"User {user_id}"
+                line = f"{position}. {name} - Lvl {user_level} ({user_xp} XP)"
+                nearby += (f"**{line}**" if user_id == target.id else line) + "\n"
+            embed.add_field(name="Nearby", value=nearby, inline=False)
              
             embed.set_footer(text=f"Total Lifetime XP: {xp}")
             
@@ -362,48 +1214,69 @@ class Levels(commands.Cog):
         else:
             await interaction.response.send_message(f"❌ {target.display_name} hasn't sent any messages yet!", ephemeral=True)
 
-    @app_commands.command(name="leaderboard", description="Show the top 10 chatters")
-    async def leaderboard(self, interaction: discord.Interaction):
+    @app_commands.command(name="leaderboard", description="Show the server leaderboard")
+    @app_commands.describe(period="Rank by XP earned today, this week or this month instead of all time")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="Today", value="daily"),
+        app_commands.Choice(name="This week", value="weekly"),
+        app_commands.Choice(name="This month", value="monthly"),
+    ])
+    async def leaderboard(self, interaction: discord.Interaction, period: app_commands.Choice[str] = None):
         """
-        SQL makes sorting easy using 'ORDER BY'.
+        Shows the leaderboard one page at a time with Previous/Next buttons.
         """
-        async with self.db.execute("""
-            SELECT user_id, xp, level FROM users 
-            WHERE guild_id = ? 
-            ORDER BY xp DESC 
-            LIMIT 10
-        """, (interaction.guild.id,)) as cursor:
-            rows = await cursor.fetchall()
+        period_key = period.value if period else None
+        rows, has_next = await self.fetch_leaderboard_page(interaction.guild.id, period=period_key)
             
         if not rows:
             await interaction.response.send_message("No data yet!", ephemeral=True)
             return
 
-        embed = discord.Embed(title="🏆 Server Leaderboard", color=discord.Color.gold())
-        description = ""
-        
-        for index, row in enumerate(rows, start=1):
-            user_id = row['user_id']
-            # We try to fetch member from cache mainly
-            member = interaction.guild.get_member(user_id)
-            name = member.display_name if member else f"User {user_id}"
-            
-            description += f"**{index}. {name}** - Lvl {row['level']} ({row['xp']} XP)\n"
-            
-        embed.description = description
-        await interaction.response.send_message(embed=embed)
+        view = LeaderboardView(self, interaction.guild, rows, has_next, period_key)
+        await interaction.response.send_message(embed=view.get_embed(), view=view)
+
     @app_commands.command(name="sync_xp", description="[Admin] Scan chat history to backfill XP")
+    @app_commands.describe(
+        limit="Max messages to scan per channel this run (0 = no limit)",
+        whole_server="Scan every text channel instead of just this one"
+    )
     @app_commands.checks.has_permissions(administrator=True)
-    async def sync_xp(self, interaction: discord.Interaction, limit: int = 1000):
+    async def sync_xp(self, interaction: discord.Interaction, limit: int = 1000, whole_server: bool = False):
         """
-        scans the current channel history and awards XP retroactively.
+        scans channel history and awards XP retroactively.
+        Each channel remembers where the last sync stopped, so running it again only picks up new messages.
         """
         await interaction.response.defer(ephemeral=True)
-        await interaction.followup.send(f"🔄 Starting sync... Scanning last {limit} messages. This might take a moment.")
-        
-        count_updated = await self.admin_sync_xp(interaction.channel, limit)
 
-        await interaction.followup.send(f"✅ Sync Complete! Updated XP for {count_updated} users based on {limit} messages.")
+        if whole_server:
+            me = interaction.guild.me
+            channels = [c for c in interaction.guild.text_channels if c.permissions_for(me).read_message_history]
+        else:
+            channels = [interaction.channel]
+
+        status = await interaction.followup.send(f"🔄 Starting sync... Scanning {len(channels)} channel(s). This might take a moment.", wait=True)
+
+        last_edit = 0
+        async def report(stats):
+            # Editing too often would hit rate limits, so at most once every 2 seconds
+            nonlocal last_edit
+            if time.monotonic() - last_edit < 2:
+                return
+            last_edit = time.monotonic()
+            try:
+                await status.edit(content=(
+                    f"🔄 Syncing... {stats['channels_done']}/{stats['channels']} channels done, "
+                    f"{stats['messages']} messages scanned, {stats['xp']} XP awarded to {len(stats['users'])} users."
+                ))
+            except discord.HTTPException:
+                pass
+
+        stats = await self.admin_backfill_xp(interaction.guild, channels, limit or None, progress=report)
+
+        summary = f"✅ Sync Complete! Scanned {stats['messages']} new messages in {stats['channels']} channel(s) and awarded {stats['xp']} XP to {len(stats['users'])} users."
+        if stats["failed"]:
+            summary += f"\n⚠️ {len(stats['failed'])} channel(s) could not be fully read."
+        await status.edit(content=summary)
     # --- Level Management Commands ---
     
     level_group = app_commands.Group(name="level", description="Manage level rewards")
@@ -418,9 +1291,13 @@ class Levels(commands.Cog):
             await interaction.response.send_message(f"❌ I cannot assign the role {role.mention} because it is higher than or equal to my highest role.", ephemeral=True)
             return
 
+        await interaction.response.defer(ephemeral=True) # the write can wait on another cluster's transaction
         await self.admin_add_reward(interaction.guild.id, level, role.id)
+
+        # Give the role to members who are already past this level
+        self.start_reward_reconcile(interaction.guild, restart=True)
         
-        await interaction.response.send_message(f"✅ Level {level} reward set to {role.mention}!", ephemeral=True)
+        await interaction.followup.send(f"✅ Level {level} reward set to {role.mention}! Existing members are being updated in the background.")
 
     @level_group.command(name="remove_reward", description="Remove a reward for a level")
     @app_commands.checks.has_permissions(manage_roles=True)
@@ -428,9 +1305,47 @@ class Levels(commands.Cog):
         """
         Remove a configured role reward for a specific level.
         """
+        await interaction.response.defer(ephemeral=True)
         await self.admin_remove_reward(interaction.guild.id, level)
+
+        # Take the role back from members who only had it as a reward
+        self.start_reward_reconcile(interaction.guild, restart=True)
         
-        await interaction.response.send_message(f"✅ Removed reward for Level {level}.", ephemeral=True)
+        await interaction.followup.send(f"✅ Removed reward for Level {level}. Existing members are being updated in the background.")
+
+    @level_group.command(name="sync_rewards", description="Make every member's reward roles match their level")
+    @app_commands.checks.has_permissions(manage_roles=True)
+    async def sync_rewards(self, interaction: discord.Interaction):
+        """
+        Adds missing reward roles and removes ones members shouldn't have, for the whole server.
+        Runs in the background (large servers take longer than an interaction lasts) and posts
+        the result in this channel when it's done.
+        """
+        await interaction.response.defer(ephemeral=True)
+        status = await interaction.followup.send("🔄 Syncing reward roles... I'll post the result in this channel when it's done.", wait=True)
+        started = time.monotonic()
+        channel = interaction.channel
+        admin = interaction.user
+
+        async def report(stats):
+            # The followup can only be edited while the interaction token is valid
+            if time.monotonic() - started > INTERACTION_EDIT_WINDOW:
+                return
+            try:
+                await status.edit(content=f"🔄 Syncing reward roles... {stats['checked']}/{stats['members']} members checked, {stats['edited']} updated.")
+            except discord.HTTPException:
+                pass
+
+        async def finish(stats):
+            summary = f"✅ {admin.mention} Reward roles synced! Checked {stats['checked']} members and updated {stats['edited']}."
+            if stats["failed"]:
+                summary += f"\n⚠️ {stats['failed']} member(s) could not be updated. Please check my role hierarchy and run `/level sync_rewards` again."
+            try:
+                await channel.send(summary, allowed_mentions=discord.AllowedMentions(users=[admin]))
+            except discord.HTTPException as e:
+                print(f"Levels Cog: Could not post the reward sync result in {channel.id}. ({e})")
+
+        self.start_reward_reconcile(interaction.guild, progress=report, restart=True, on_finish=finish)
 
     @level_group.command(name="rewards", description="List all level rewards")
     async def list_rewards(self, interaction: discord.Interaction):
@@ -463,8 +1378,9 @@ class Levels(commands.Cog):
             await interaction.response.send_message("🤖 Bots don't need XP!", ephemeral=True)
             return
 
-        new_xp = await self.admin_give_xp(member.id, interaction.guild.id, amount)
-        await interaction.response.send_message(f"✅ Adjusted {member.mention}'s XP by {amount}. New Total: {new_xp}", ephemeral=True)
+        await interaction.response.defer(ephemeral=True)
+        new_xp = await self.admin_give_xp(member.id, interaction.guild.id, amount, actor_id=interaction.user.id)
+        await interaction.followup.send(f"✅ Adjusted {member.mention}'s XP by {amount}. New Total: {new_xp}")
 
     @level_group.command(name="set_level", description="Set a user's level directly")
     @app_commands.checks.has_permissions(administrator=True)
@@ -476,9 +1392,10 @@ class Levels(commands.Cog):
             await interaction.response.send_message("❌ Level must be at least 1.", ephemeral=True)
             return
             
-        required_xp = await self.admin_set_level(member.id, interaction.guild.id, level)
+        await interaction.response.defer(ephemeral=True)
+        required_xp = await self.admin_set_level(member.id, interaction.guild.id, level, actor_id=interaction.user.id)
         
-        await interaction.response.send_message(f"✅ Set {member.mention} to **Level {level}** (XP set to {required_xp}).", ephemeral=True)
+        await interaction.followup.send(f"✅ Set {member.mention} to **Level {level}** (XP set to {required_xp}).")
 
     @level_group.command(name="set_xp_rate", description="Set XP per message. Leave empty to reset to default (10).")
     @app_commands.checks.has_permissions(administrator=True)
@@ -487,17 +1404,18 @@ class Levels(commands.Cog):
         Configure how much XP is given per message for this server.
         If amount is not provided, resets to default (10).
         """
+        if amount is not None and amount < 1:
+            await interaction.response.send_message("❌ XP rate must be at least 1.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
         if amount is None:
              await self.set_guild_xp_rate(interaction.guild.id, 10)
-             await interaction.response.send_message("✅ XP Rate **reset** to default (**10 XP** per message).", ephemeral=True)
+             await interaction.followup.send("✅ XP Rate **reset** to default (**10 XP** per message).")
              return
 
-        if amount < 1:
-            await interaction.response.send_message("❌ XP rate must be at least 1.", ephemeral=True)
-            return
-
         await self.set_guild_xp_rate(interaction.guild.id, amount)
-        await interaction.response.send_message(f"✅ XP Rate set to **{amount} XP** per message.", ephemeral=True)
+        await interaction.followup.send(f"✅ XP Rate set to **{amount} XP** per message.")
 
     @level_group.command(name="set_cooldown", description="Set XP cooldown in seconds. Default 10.")
     @app_commands.checks.has_permissions(administrator=True)
@@ -509,14 +1427,10 @@ class Levels(commands.Cog):
             await interaction.response.send_message("❌ Cooldown cannot be negative.", ephemeral=True)
             return
 
-        await self.db.execute("""
-            INSERT INTO guild_settings (guild_id, xp_rate, xp_cooldown)
-            VALUES (?, 10, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET xp_cooldown = ?
-        """, (interaction.guild.id, seconds, seconds))
-        await self.db.commit()
+        await interaction.response.defer(ephemeral=True)
+        await self.set_guild_cooldown(interaction.guild.id, seconds)
         
-        await interaction.response.send_message(f"✅ XP Cooldown set to **{seconds} seconds**.", ephemeral=True)
+        await interaction.followup.send(f"✅ XP Cooldown set to **{seconds} seconds**.")
 
     @level_group.command(name="reset", description="Reset a user's XP to the base requirement for their current level")
     @app_commands.checks.has_permissions(administrator=True)
@@ -529,20 +1443,20 @@ class Levels(commands.Cog):
             await interaction.response.send_message("🤖 Bots don't need XP resets!", ephemeral=True)
             return
 
-        # Fetch current level
-        async with self.db.execute("SELECT level FROM users WHERE user_id = ? AND guild_id = ?", (member.id, interaction.guild.id)) as cursor:
-            row = await cursor.fetchone()
+        # Current level, from the ranking index (always up to date, no DB round trip)
+        row = self.rankings.guild(interaction.guild.id).get(member.id)
         
         if not row:
             await interaction.response.send_message(f"❌ {member.display_name} has no data to reset.", ephemeral=True)
             return
 
-        current_level = row['level']
+        current_level = row[1]
         
         # Reuse set_level to force the XP reset
-        required_xp = await self.admin_set_level(member.id, interaction.guild.id, current_level)
+        await interaction.response.defer(ephemeral=True)
+        required_xp = await self.admin_set_level(member.id, interaction.guild.id, current_level, actor_id=interaction.user.id)
         
-        await interaction.response.send_message(f"✅ Reset {member.mention}'s XP to **{required_xp}** (Base for Level {current_level}).", ephemeral=True)
+        await interaction.followup.send(f"✅ Reset {member.mention}'s XP to **{required_xp}** (Base for Level {current_level}).")
 
     @level_group.command(name="recalculate", description="Recalculate a user's level based on their XP")
     @app_commands.checks.has_permissions(administrator=True)
@@ -554,22 +1468,119 @@ class Levels(commands.Cog):
             await interaction.response.send_message("🤖 Bots don't have levels!", ephemeral=True)
             return
 
-        async with self.db.execute("SELECT xp FROM users WHERE user_id = ? AND guild_id = ?", (member.id, interaction.guild.id)) as cursor:
-            row = await cursor.fetchone()
+        # Formula: MEE6
+        await interaction.response.defer(ephemeral=True)
+        result = await self.admin_recalculate_user(member.id, interaction.guild.id)
         
-        if not row:
-            await interaction.response.send_message(f"❌ {member.display_name} has no data.", ephemeral=True)
+        if not result:
+            await interaction.followup.send(f"❌ {member.display_name} has no data.")
             return
 
-        current_xp = row['xp']
-        current_xp = row['xp']
-        # Formula: MEE6
-        correct_level = self.calculate_level_from_xp(current_xp)
+        current_xp, correct_level = result
+
+        await interaction.followup.send(f"✅ Recalculated {member.mention}: **Level {correct_level}** ({current_xp} XP).")
+
+    @level_group.command(name="recalculate_all", description="Recalculate every member's level based on their XP")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def recalculate_all(self, interaction: discord.Interaction):
+        """
+        Guild-wide /level recalculate, done as a single UPDATE inside SQLite.
+        Useful after a formula change or to fix corrupted levels.
+        """
+        await interaction.response.defer(ephemeral=True)
+        changed = await self.admin_recalculate_all(interaction.guild.id)
+        await interaction.followup.send(f"✅ Recalculated all levels. **{changed}** member(s) changed level.")
+
+    @level_group.command(name="reset_all", description="Reset every member's XP to the base requirement for their current level")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def reset_all(self, interaction: discord.Interaction):
+        """
+        Guild-wide /level reset, done as a single UPDATE inside SQLite.
+        """
+        await interaction.response.defer(ephemeral=True)
+        changed = await self.admin_reset_all(interaction.guild.id, actor_id=interaction.user.id)
+        await interaction.followup.send(f"✅ Reset XP for **{changed}** member(s) to the base of their current level.")
+
+    @level_group.command(name="history", description="Show the latest XP changes for a user")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def history(self, interaction: discord.Interaction, member: discord.Member):
+        """
+        Lists the latest entries of the XP ledger for a member (chat XP, backfills and admin changes).
+        """
+        rows = await self.get_xp_history(interaction.guild.id, member.id, limit=15)
+        if not rows:
+            await interaction.response.send_message(f"❌ {member.display_name} has no XP history.", ephemeral=True)
+            return
+
+        lines = []
+        for row in rows:
+            line = f"<t:{row['created_at']}:R> **{row['amount']:+}** XP ({row['source']})"
+            if row['actor_id']:
+                line += f" by <@{row['actor_id']}>"
+            lines.append(line)
 
-        await self.db.execute("UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?", (correct_level, member.id, interaction.guild.id))
-        await self.db.commit()
+        embed = discord.Embed(title=f"📜 XP History: {member.display_name}", description="\n".join(lines), color=discord.Color.dark_gold())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @level_group.command(name="rebuild", description="Rebuild every member's XP and level from the XP history")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def rebuild(self, interaction: discord.Interaction):
+        """
+        Replays the XP ledger for the whole guild. Only needed if the users table was edited by hand.
+        """
+        await interaction.response.defer(ephemeral=True)
+        changed = await self.admin_rebuild_from_ledger(interaction.guild.id)
+        await interaction.followup.send(f"✅ Rebuilt XP from history. **{changed}** member(s) changed.")
+
+    @level_group.command(name="export", description="Export every member's XP and level as a file")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.choices(file_format=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="JSONL", value="jsonl"),
+    ])
+    async def export(self, interaction: discord.Interaction, file_format: app_commands.Choice[str] = None):
+        """
+        Streams the guild's levels data to a temporary file and uploads it.
+        """
+        fmt = file_format.value if file_format else "csv"
+        await interaction.response.defer(ephemeral=True)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"levels_{interaction.guild.id}.{fmt}")
+            count = await self.admin_export_guild(interaction.guild.id, path, fmt)
+
+            if os.path.getsize(path) > interaction.guild.filesize_limit:
+                await interaction.followup.send("❌ The export is too big to upload here. Use `python levels_cli.py export` on the bot host instead.")
+                return
+            await interaction.followup.send(f"✅ Exported **{count}** member(s).", file=discord.File(path))
+
+    @level_group.command(name="import", description="Import members' XP from a CSV, JSONL or JSON file (MEE6 exports work too)")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(file="CSV, JSONL or JSON with user_id (or id) and xp columns", add="Add the XP on top instead of replacing it")
+    async def import_levels(self, interaction: discord.Interaction, file: discord.Attachment, add: bool = False):
+        """
+        Sets (or adds) XP for every member listed in the file. Levels are recalculated from XP.
+        """
+        try:
+            fmt = levels_io.detect_format(file.filename)
+        except levels_io.ImportFormatError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"import.{fmt}")
+            await file.save(path)
+            try:
+                result = await self.admin_import_guild(interaction.guild.id, path, fmt, replace=not add, actor_id=interaction.user.id)
+            except levels_io.ImportFormatError as e:
+                await interaction.followup.send(f"❌ Nothing was imported. {e}")
+                return
 
-        await interaction.response.send_message(f"✅ Recalculated {member.mention}: **Level {correct_level}** ({current_xp} XP).", ephemeral=True)
+        await interaction.followup.send(
+            f"✅ Imported **{result['rows']}** row(s), **{result['changed']}** member(s) changed.\n"
+            "Run `/level sync_rewards` to hand out the matching reward roles."
+        )
 
 async def setup(bot):
     await bot.add_cog(Levels(bot))
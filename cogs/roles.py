@@ -1,25 +1,40 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import json
 import os
 
-# Path to the JSON file
+from utils import levels_db, roles_db
+
+# Role menus are stored per guild in roles.db
+ROLES_DB_FILE = "/app/data/roles.db" if os.path.exists("/app/data") else "./data/roles.db"
+
+# Old global JSON config, imported into roles.db once (for GUILD_ID) and then renamed
 ROLES_FILE = "/app/data/roles.json" if os.path.exists("/app/data") else "./data/roles.json"
 
-def load_roles_config():
-    if not os.path.exists(ROLES_FILE):
+# Discord limits: 25 options per select, 5 component rows per message.
+# A select fills a row, so a menu page has 4 selects and a row of page buttons.
+MAX_SELECT_OPTIONS = 25
+SELECTS_PER_PAGE = 4
+
+# Text of the ephemeral role menu
+ROLE_MENU_TEXT = (
+    "👇 **Select your roles below**\n"
+    "• Use the dropdowns to pick your roles.\n"
+    "• Checkboxes show what you currently have."
+)
+
+def read_roles_config(path: str = ROLES_FILE):
+    """Reads and parses the old roles.json (only used by the one-time import into roles.db)."""
+    if not os.path.exists(path):
         return {"categories": []}
     
     try:
-        with open(ROLES_FILE, "r") as f:
-             # We assume migration was handled or file is fresh.
-             # If you need the migration logic again, we can keep it, 
-             # but it's likely already run or not needed if file is new.
-             # Keeping it simple for the view logic.
+        with open(path, "r") as f:
              data = json.load(f)
              if "colors" in data or "hobbies" in data:
-                  # Quick migration re-implementation to be safe
+                  # Old format (fixed colors/hobbies lists), converted to categories
                   new_categories = []
                   if "colors" in data and data["colors"]:
                       new_categories.append({"name": "Colors", "is_exclusive": True, "roles": data["colors"]})
@@ -30,149 +45,189 @@ def load_roles_config():
     except json.JSONDecodeError:
         return {"categories": []}
 
-def save_roles_config(data):
-    os.makedirs(os.path.dirname(ROLES_FILE), exist_ok=True)
-    with open(ROLES_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+
+def build_option_templates(category) -> list:
+    """
+    Everything about a category's select options that doesn't depend on the user:
+    [(role_id, label, value, emoji, description when selected, description when not)].
+    Emojis are parsed once here instead of on every menu open.
+    """
+    templates = []
+    for item in category.get('roles', []):
+        emoji = item.get('emoji')
+        templates.append((
+            item['id'],
+            item['label'],
+            str(item['id']),
+            discord.PartialEmoji.from_str(emoji) if emoji else None,
+            f"Selected {item['label']}",
+            f"Select {item['label']}",
+        ))
+    return templates
+
+def plan_role_menu_pages(config) -> list:
+    """
+    Splits the config into menu pages: [[(category, first option index)]].
+    Categories with more than MAX_SELECT_OPTIONS roles become several selects, and each
+    page holds up to SELECTS_PER_PAGE selects. Only indexes are computed here, the
+    selects themselves are built when a page is shown.
+    """
+    chunks = []
+    for cat in config.get('categories', []):
+        count = len(cat.get('templates', []))
+        for start in range(0, max(count, 1), MAX_SELECT_OPTIONS):
+            chunks.append((cat, start))
+    return [chunks[i:i + SELECTS_PER_PAGE] for i in range(0, len(chunks), SELECTS_PER_PAGE)]
+
 
 class UserSpecificRoleSelect(discord.ui.Select):
     """
     A select menu tailored to a specific user's current roles.
+    Shows up to MAX_SELECT_OPTIONS roles of a category, starting at `start`.
     """
-    def __init__(self, category, user, guild):
+    def __init__(self, category, user_role_ids: set, guild, start: int = 0):
         self.category_name = category['name']
         self.is_exclusive = category.get('is_exclusive', False)
         self.roles_data = category.get('roles', [])
+        all_templates = category.get('templates', [])
+        self.templates = all_templates[start:start + MAX_SELECT_OPTIONS]
         self.guild = guild
+
+        # Roles this select is responsible for. An exclusive category split over several
+        # selects still allows one role overall, a multi-select one only syncs its own part.
+        if self.is_exclusive:
+            self.scope_ids = {r['id'] for r in self.roles_data}
+        else:
+            self.scope_ids = {t[0] for t in self.templates}
         
-        # Build options
-        options = []
-        user_role_ids = [r.id for r in user.roles]
-        
-        for item in self.roles_data:
-            role_id = item['id']
-            is_selected = role_id in user_role_ids
-            
-            options.append(discord.SelectOption(
-                label=item['label'],
-                value=str(role_id),
-                emoji=item.get('emoji'),
-                description=f"{'Selected' if is_selected else 'Select'} {item['label']}",
-                default=is_selected 
-            ))
-        
-        # Handle empty case
-        if not options:
-            options.append(discord.SelectOption(label="No roles configured", value="none"))
+        options = self.build_options(user_role_ids)
 
         # Determine Max Values
         # If exclusive: max 1.
         # If multi: max is len(options).
         max_vals = 1 if self.is_exclusive else len(options)
-        max_vals = min(max(1, max_vals), 25)
+        max_vals = min(max(1, max_vals), MAX_SELECT_OPTIONS)
+
+        placeholder = f"Select {self.category_name}..."
+        if len(all_templates) > MAX_SELECT_OPTIONS:
+            part = start // MAX_SELECT_OPTIONS + 1
+            parts = -(-len(all_templates) // MAX_SELECT_OPTIONS)
+            placeholder = f"Select {self.category_name} ({part}/{parts})..."
 
         super().__init__(
-            placeholder=f"Select {self.category_name}...",
+            placeholder=placeholder,
             min_values=0 if not self.is_exclusive else 1, # Multi can deselect all. Exclusive usually implies 1, unless we allow 0? Let's say min 0 for multi.
             max_values=max_vals,
-            options=options[:25]
+            options=options
         )
 
+    def build_options(self, user_role_ids: set) -> list:
+        """Options from the cached templates, only the selected state is per user."""
+        options = []
+        for role_id, label, value, emoji, selected_description, description in self.templates:
+            is_selected = role_id in user_role_ids
+            
+            options.append(discord.SelectOption(
+                label=label,
+                value=value,
+                emoji=emoji,
+                description=selected_description if is_selected else description,
+                default=is_selected 
+            ))
+        
+        # Handle empty case
+        if not options:
+            options.append(discord.SelectOption(label="No roles configured", value="none"))
+        return options
+
     async def callback(self, interaction: discord.Interaction):
         if self.values and self.values[0] == "none":
             await interaction.response.defer() # Do nothing
             return
 
-        # Refetch user to get latest state? 
-        # Actually interaction.user is cached. To be super safe we might want interaction.guild.get_member(user.id)
-        # But for now, standard user object is okay.
-        
+        # The cached member is kept up to date by gateway events
         member = interaction.guild.get_member(interaction.user.id)
         if not member:
             return
 
+        current_ids = {r.id for r in member.roles}
         selected_ids = set(int(v) for v in self.values)
-        
-        # All potential role IDs in this category
-        category_role_ids = set(r['id'] for r in self.roles_data)
-        
-        # Identify what to Add and what to Remove
-        to_add = []
-        to_remove = []
 
-        if self.is_exclusive:
-            # Exclusive Logic:
-            # The user picked ONE value (or zero if we allowed min 0, but we set min 1 typically for radios. 
-            # Actually standard generic Select min_values=1).
-            # If they picked X, we must remove ALL other roles in this category.
-            
-            target_id = int(self.values[0])
-            target_role =  interaction.guild.get_role(target_id)
-            
-            # Roles to remove: Any role in this category that the user HAS, except the chosen one
-            for r_id in category_role_ids:
-                if r_id != target_id:
-                     role_obj = interaction.guild.get_role(r_id)
-                     if role_obj and role_obj in member.roles:
-                         to_remove.append(role_obj)
-            
-            # Role to add: The chosen one (if not already possessed)
-            if target_role and target_role not in member.roles:
-                to_add.append(target_role)
+        # Exclusive: only the picked role. Multi-select: exactly what is ticked.
+        wanted_ids = {int(self.values[0])} if self.is_exclusive else selected_ids
+        wanted_ids &= self.scope_ids
+
+        to_remove = [interaction.guild.get_role(r_id) for r_id in (self.scope_ids - wanted_ids) & current_ids]
+        to_add = [interaction.guild.get_role(r_id) for r_id in wanted_ids - current_ids]
+        to_remove = [r for r in to_remove if r]
+        to_add = [r for r in to_add if r]
+
+        response_text = []
+        if to_remove or to_add:
+            # One request for the whole change instead of remove_roles + add_roles
+            remove_ids = {r.id for r in to_remove}
+            new_roles = [r for r in member.roles if not r.is_default() and r.id not in remove_ids] + to_add
+            try:
+                await member.edit(roles=new_roles, reason=f"Role menu: {self.category_name}")
+            except discord.Forbidden:
+                await interaction.response.send_message("❌ I do not have permission to manage these roles!", ephemeral=True)
+                return
 
-        else:
-            # Multi-Select Logic (Sync State):
-            # Iterate through ALL roles in this category.
-            # If ID is in selected_ids -> Ensure user HAS it (Add if missing).
-            # If ID is NOT in selected_ids -> Ensure user does NOT have it (Remove if present).
-            
-            for r_id in category_role_ids:
-                role_obj = interaction.guild.get_role(r_id)
-                if not role_obj: continue
-                
-                if r_id in selected_ids:
-                    # User WANTS this role
-                    if role_obj not in member.roles:
-                        to_add.append(role_obj)
-                else:
-                    # User does NOT want this role (unchecked it)
-                    if role_obj in member.roles:
-                        to_remove.append(role_obj)
-
-        # Apply Changes
-        response_text = [] # Silent implementation? Or ephemeral feedback? 
-        # Since the menu is ephemeral, feedback is good.
-        
-        try:
             if to_remove:
-                await member.remove_roles(*to_remove)
                 response_text.append(f"Removed: {', '.join(r.name for r in to_remove)}")
-            
             if to_add:
-                await member.add_roles(*to_add)
                 response_text.append(f"Added: {', '.join(r.name for r in to_add)}")
-                
-        except discord.Forbidden:
-            await interaction.response.send_message("❌ I do not have permission to manage these roles!", ephemeral=True)
-            return
+            current_ids = (current_ids - remove_ids) | {r.id for r in to_add}
             
-        final_msg = "Updated!" if not response_text else " | ".join(response_text)
-        
-        # We need to defer or edit to acknowledge the interaction so it doesn't fail
-        # Re-sending the message updates the view state (checkboxes) automatically? 
-        # No, we need to update the options to reflect new 'default' values if we want the menu to stay consistent.
-        # But closing it is also fine.
-        
-        await interaction.response.send_message(final_msg, ephemeral=True)
+        final_msg = "No changes." if not response_text else " | ".join(response_text)
+
+        # Update the menu in place so the checkboxes show the new roles
+        self.view.refresh(current_ids)
+        await interaction.response.edit_message(content=f"{ROLE_MENU_TEXT}\n\n✅ {final_msg}", view=self.view)
+
+
+class RoleMenuPageButton(discord.ui.Button):
+    def __init__(self, label: str, step: int, disabled: bool):
+        super().__init__(label=label, style=discord.ButtonStyle.secondary, disabled=disabled, row=SELECTS_PER_PAGE)
+        self.step = step
+
+    async def callback(self, interaction: discord.Interaction):
+        self.view.show_page(self.view.page + self.step)
+        await interaction.response.edit_message(view=self.view)
 
 
 class UserSpecificRoleView(discord.ui.View):
-    def __init__(self, user, guild):
+    """
+    The user's role menu. Only the current page's selects exist at any time,
+    the next page is built when the user turns to it.
+    """
+    def __init__(self, user, guild, config):
         super().__init__(timeout=180) # Ephemeral views can timeout
-        
-        config = load_roles_config()
-        for cat in config.get('categories', []):
-            self.add_item(UserSpecificRoleSelect(cat, user, guild))
+        self.guild = guild
+        self.role_ids = {r.id for r in user.roles} # kept current as the menu edits roles
+        self.pages = plan_role_menu_pages(config)
+        self.page = 0
+        if self.pages:
+            self.show_page(0)
+
+    def show_page(self, page: int):
+        self.page = max(0, min(page, len(self.pages) - 1))
+        self.clear_items()
+        for category, start in self.pages[self.page]:
+            self.add_item(UserSpecificRoleSelect(category, self.role_ids, self.guild, start))
+
+        if len(self.pages) > 1:
+            self.add_item(RoleMenuPageButton("◀️ Previous", -1, disabled=self.page == 0))
+            indicator = discord.ui.Button(label=f"Page {self.page + 1}/{len(self.pages)}", disabled=True, row=SELECTS_PER_PAGE)
+            self.add_item(indicator)
+            self.add_item(RoleMenuPageButton("Next ▶️", 1, disabled=self.page == len(self.pages) - 1))
+
+    def refresh(self, role_ids: set):
+        """Re-renders the selects on the current page after the user's roles changed."""
+        self.role_ids = role_ids
+        for item in self.children:
+            if isinstance(item, UserSpecificRoleSelect):
+                item.options = item.build_options(role_ids)
 
 class MasterRoleButton(discord.ui.Button):
     def __init__(self):
@@ -184,18 +239,14 @@ class MasterRoleButton(discord.ui.Button):
         )
         
     async def callback(self, interaction: discord.Interaction):
-        view = UserSpecificRoleView(interaction.user, interaction.guild)
+        cog = interaction.client.get_cog("Roles")
+        config = await cog.get_role_config(interaction.guild.id)
+        view = UserSpecificRoleView(interaction.user, interaction.guild, config)
         if not view.children:
              await interaction.response.send_message("❌ No roles are currently configured.", ephemeral=True)
              return
         
-        await interaction.response.send_message(
-            "👇 **Select your roles below**\n"
-            "• Use the dropdowns to pick your roles.\n"
-            "• Checkboxes show what you currently have.", 
-            view=view, 
-            ephemeral=True
-        )
+        await interaction.response.send_message(ROLE_MENU_TEXT, view=view, ephemeral=True)
 
 class MasterView(discord.ui.View):
     def __init__(self):
@@ -205,59 +256,161 @@ class MasterView(discord.ui.View):
 class Roles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = None
+        self.write_lock = asyncio.Lock()
+        # guild_id -> config dict (with option templates), filled on first use, dropped on every admin change
+        self.config_cache = {}
+
+    async def cog_load(self):
+        self.db = await roles_db.connect(ROLES_DB_FILE)
+        applied = await roles_db.migrate(self.db)
+        if applied:
+            print(f"Roles Cog: Applied schema migrations {applied}.")
+        await self.import_json_config()
+
+    async def cog_unload(self):
+        if self.db:
+            await self.db.close()
+
+    async def import_json_config(self):
+        """
+        One-time import of the old global roles.json into roles.db, for the GUILD_ID guild.
+        The file is renamed first, so it never runs twice and the original stays as a backup.
+        The rename is atomic: when several clusters start at once, exactly one of them gets
+        the file and imports it, the others find nothing to do.
+        """
+        guild_id = os.getenv('GUILD_ID')
+        if not guild_id:
+            return
+
+        imported_file = ROLES_FILE + ".imported"
+        try:
+            os.replace(ROLES_FILE, imported_file)
+        except FileNotFoundError:
+            return # Nothing to import, or another cluster claimed it
+
+        try:
+            config = read_roles_config(imported_file)
+            async with self.write_lock:
+                await levels_db.begin_immediate(self.db)
+                try:
+                    for position, cat in enumerate(config.get('categories', []), 1):
+                        cursor = await self.db.execute("""
+                            INSERT OR IGNORE INTO role_categories (guild_id, name, name_key, description, is_exclusive, position)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        """, (int(guild_id), cat['name'], cat['name'].lower(), cat.get('description'), int(cat.get('is_exclusive', False)), position))
+                        if not cursor.rowcount:
+                            continue # Already in the DB
+                        await self.db.executemany("""
+                            INSERT OR IGNORE INTO menu_roles (category_id, role_id, label, emoji, position)
+                            VALUES (?, ?, ?, ?, ?)
+                        """, [(cursor.lastrowid, r['id'], r['label'], r.get('emoji'), i) for i, r in enumerate(cat.get('roles', []), 1)])
+                    await self.db.commit()
+                except BaseException:
+                    await self.db.rollback()
+                    raise
+        except Exception:
+            # Hand the file back so the import is retried on the next start
+            os.replace(imported_file, ROLES_FILE)
+            raise
+
+        self.config_cache.pop(int(guild_id), None)
+        print(f"Roles Cog: Imported {len(config.get('categories', []))} categories from {ROLES_FILE}.")
 
     # --- Public Admin Methods (API) ---
     
-    def get_role_config(self):
-        return load_roles_config()
-
-    def admin_create_category(self, name: str, description: str, is_exclusive: bool) -> bool:
+    async def get_role_config(self, guild_id: int):
+        """
+        Returns {"categories": [{id, name, description, is_exclusive, roles: [{id, label, emoji}], templates}]}.
+        Served from memory after the first call, treat it as read-only.
+        """
+        config = self.config_cache.get(guild_id)
+        if config is not None:
+            return config
+
+        categories = {}
+        async with self.db.execute("""
+            SELECT c.id, c.name, c.description, c.is_exclusive, r.role_id, r.label, r.emoji
+            FROM role_categories c LEFT JOIN menu_roles r ON r.category_id = c.id
+            WHERE c.guild_id = ?
+            ORDER BY c.position, r.position
+        """, (guild_id,)) as cursor:
+            async for row in cursor:
+                cat = categories.get(row['id'])
+                if cat is None:
+                    cat = categories[row['id']] = {
+                        "id": row['id'], "name": row['name'], "description": row['description'],
+                        "is_exclusive": bool(row['is_exclusive']), "roles": []
+                    }
+                if row['role_id'] is not None:
+                    cat['roles'].append({"id": row['role_id'], "label": row['label'], "emoji": row['emoji']})
+
+        for cat in categories.values():
+            cat['templates'] = build_option_templates(cat)
+        config = self.config_cache[guild_id] = {"categories": list(categories.values())}
+        return config
+
+    async def get_category_id(self, guild_id: int, name: str):
+        async with self.db.execute("SELECT id FROM role_categories WHERE guild_id = ? AND name_key = ?", (guild_id, name.lower())) as cursor:
+            row = await cursor.fetchone()
+            return row['id'] if row else None
+
+    async def admin_create_category(self, guild_id: int, name: str, description: str, is_exclusive: bool) -> bool:
         """Returns True if created, False if already exists."""
-        config = load_roles_config()
-        if any(c['name'].lower() == name.lower() for c in config.get('categories', [])):
-             return False
-        config.setdefault('categories', []).append({
-            "name": name, "description": description, "is_exclusive": is_exclusive, "roles": []
-        })
-        save_roles_config(config)
-        return True
-
-    def admin_delete_category(self, name: str) -> bool:
+        async with self.write_lock:
+            cursor = await self.db.execute("""
+                INSERT OR IGNORE INTO role_categories (guild_id, name, name_key, description, is_exclusive, position)
+                SELECT ?, ?, ?, ?, ?, COALESCE(MAX(position), 0) + 1 FROM role_categories WHERE guild_id = ?
+            """, (guild_id, name, name.lower(), description, int(is_exclusive), guild_id))
+            await self.db.commit()
+        self.config_cache.pop(guild_id, None)
+        return cursor.rowcount > 0
+
+    async def admin_delete_category(self, guild_id: int, name: str) -> bool:
         """Returns True if deleted, False if not found."""
-        config = load_roles_config()
-        initial = len(config.get('categories', []))
-        config['categories'] = [c for c in config.get('categories', []) if c['name'].lower() != name.lower()]
-        if len(config.get('categories', [])) == initial:
-            return False
-        save_roles_config(config)
+        async with self.write_lock:
+            category_id = await self.get_category_id(guild_id, name)
+            if category_id is None:
+                return False
+            await self.db.execute("DELETE FROM menu_roles WHERE category_id = ?", (category_id,))
+            await self.db.execute("DELETE FROM role_categories WHERE id = ?", (category_id,))
+            await self.db.commit()
+        self.config_cache.pop(guild_id, None)
         return True
 
-    def admin_add_role(self, category_name: str, role_id: int, label: str, emoji: str) -> str:
+    async def admin_add_role(self, guild_id: int, category_name: str, role_id: int, label: str, emoji: str) -> str:
         """Returns 'OK', 'CAT_NOT_FOUND', or 'ROLE_EXISTS'."""
-        config = load_roles_config()
-        cat = next((c for c in config.get('categories', []) if c['name'].lower() == category_name.lower()), None)
-        if not cat: return 'CAT_NOT_FOUND'
-        
-        if any(r['id'] == role_id for r in cat['roles']):
+        async with self.write_lock:
+            category_id = await self.get_category_id(guild_id, category_name)
+            if category_id is None:
+                return 'CAT_NOT_FOUND'
+
+            cursor = await self.db.execute("""
+                INSERT OR IGNORE INTO menu_roles (category_id, role_id, label, emoji, position)
+                SELECT ?, ?, ?, ?, COALESCE(MAX(position), 0) + 1 FROM menu_roles WHERE category_id = ?
+            """, (category_id, role_id, label, emoji or "🔹", category_id))
+            await self.db.commit()
+        if not cursor.rowcount:
             return 'ROLE_EXISTS'
-            
-        cat['roles'].append({"id": role_id, "label": label, "emoji": emoji or "🔹"})
-        save_roles_config(config)
+        self.config_cache.pop(guild_id, None)
         return 'OK'
 
-    def admin_remove_role(self, category_name: str, identifier: str) -> str:
+    async def admin_remove_role(self, guild_id: int, category_name: str, identifier: str) -> str:
         """Returns 'OK', 'CAT_NOT_FOUND', or 'ROLE_NOT_FOUND'."""
-        config = load_roles_config()
-        cat = next((c for c in config.get('categories', []) if c['name'].lower() == category_name.lower()), None)
-        if not cat: return 'CAT_NOT_FOUND'
-
-        initial = len(cat['roles'])
-        cat['roles'] = [r for r in cat['roles'] if str(r['id']) != identifier and r['label'].lower() != identifier.lower()]
-        
-        if len(cat['roles']) == initial:
-             return 'ROLE_NOT_FOUND'
-        
-        save_roles_config(config)
+        async with self.write_lock:
+            category_id = await self.get_category_id(guild_id, category_name)
+            if category_id is None:
+                return 'CAT_NOT_FOUND'
+
+            # identifier is a role ID or a label
+            cursor = await self.db.execute(
+                "DELETE FROM menu_roles WHERE category_id = ? AND (CAST(role_id AS TEXT) = ? OR lower(label) = ?)",
+                (category_id, identifier, identifier.lower())
+            )
+            await self.db.commit()
+        if not cursor.rowcount:
+            return 'ROLE_NOT_FOUND'
+        self.config_cache.pop(guild_id, None)
         return 'OK'
 
     @commands.Cog.listener()
@@ -283,7 +436,7 @@ class Roles(commands.Cog):
     @app_commands.describe(name="Name (e.g. Pronouns)", is_exclusive="True=Radio, False=Checkbox")
     @app_commands.checks.has_permissions(administrator=True)
     async def create_category(self, interaction: discord.Interaction, name: str, description: str, is_exclusive: bool):
-        success = self.admin_create_category(name, description, is_exclusive)
+        success = await self.admin_create_category(interaction.guild.id, name, description, is_exclusive)
         if success:
              await interaction.response.send_message(f"✅ Created category **{name}**.", ephemeral=True)
         else:
@@ -292,7 +445,7 @@ class Roles(commands.Cog):
     @role_group.command(name="delete_category", description="Delete a category")
     @app_commands.checks.has_permissions(administrator=True)
     async def delete_category(self, interaction: discord.Interaction, name: str):
-        success = self.admin_delete_category(name)
+        success = await self.admin_delete_category(interaction.guild.id, name)
         if success:
             await interaction.response.send_message(f"✅ Deleted **{name}**.", ephemeral=True)
         else:
@@ -301,7 +454,7 @@ class Roles(commands.Cog):
     @role_group.command(name="add_role", description="Add a role to a category")
     @app_commands.checks.has_permissions(administrator=True)
     async def add_role(self, interaction: discord.Interaction, category_name: str, role: discord.Role, label: str, emoji: str = None):
-        result = self.admin_add_role(category_name, role.id, label, emoji)
+        result = await self.admin_add_role(interaction.guild.id, category_name, role.id, label, emoji)
         
         if result == 'OK':
              await interaction.response.send_message(f"✅ Added **{label}** to **{category_name}**.", ephemeral=True)
@@ -313,7 +466,7 @@ class Roles(commands.Cog):
     @role_group.command(name="remove_role", description="Remove a role from a category")
     @app_commands.checks.has_permissions(administrator=True)
     async def remove_role(self, interaction: discord.Interaction, category_name: str, identifier: str):
-        result = self.admin_remove_role(category_name, identifier)
+        result = await self.admin_remove_role(interaction.guild.id, category_name, identifier)
         
         if result == 'OK':
              await interaction.response.send_message(f"✅ Removed role from **{category_name}**.", ephemeral=True)
@@ -324,7 +477,7 @@ class Roles(commands.Cog):
 
     @role_group.command(name="list", description="List configurations")
     async def list_config(self, interaction: discord.Interaction):
-        config = self.get_role_config()
+        config = await self.get_role_config(interaction.guild.id)
         embed = discord.Embed(title="Dynamic Roles", color=discord.Color.blurple())
         for c in config.get('categories', []):
             roles = [f"{r.get('emoji','')} {r['label']}" for r in c['roles']]
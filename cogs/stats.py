@@ -0,0 +1,58 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.metrics import registry
+
+
+class Stats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    def format_histograms(self, name: str, label: str, limit: int = 10) -> str:
+        """One line per labelled histogram, busiest first: count, p50 and p99 in ms."""
+        rows = sorted(registry.histograms_named(name), key=lambda item: item[1].count, reverse=True)
+        lines = []
+        for labels, h in rows[:limit]:
+            lines.append(
+                f"`{labels.get(label, '?')}` - {h.count}x, "
+                f"p50 {h.quantile(0.5) * 1000:.1f}ms, p99 {h.quantile(0.99) * 1000:.1f}ms"
+            )
+        return "\n".join(lines) or "No data yet."
+
+    @app_commands.command(name="stats", description="[Admin] Show bot performance metrics")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def stats(self, interaction: discord.Interaction):
+        embed = discord.Embed(title="📊 Bot Stats", color=discord.Color.teal())
+        embed.add_field(name="Gateway Latency", value=f"{round(self.bot.latency * 1000)} ms", inline=False)
+        embed.add_field(name="Listeners", value=self.format_histograms("listener_seconds", "listener"), inline=False)
+        embed.add_field(name="Commands", value=self.format_histograms("app_command_seconds", "command"), inline=False)
+
+        # DB queries are labelled by connection and SQL verb
+        db_lines = []
+        for labels, h in sorted(registry.histograms_named("db_query_seconds"), key=lambda item: item[1].count, reverse=True)[:10]:
+            db_lines.append(
+                f"`{labels.get('db')} {labels.get('op')}` - {h.count}x, "
+                f"p50 {h.quantile(0.5) * 1000:.2f}ms, p99 {h.quantile(0.99) * 1000:.2f}ms"
+            )
+        embed.add_field(name="Database", value="\n".join(db_lines) or "No data yet.", inline=False)
+
+        levels = self.bot.get_cog("Levels")
+        if levels:
+            cache = levels.cache_stats
+            embed.add_field(
+                name="Levels Cache",
+                value=(
+                    f"Settings cache: {cache['settings_hits']} hits / {cache['settings_misses']} misses\n"
+                    f"Users on cooldown: {levels.get_cooldown_store_size()}\n"
+                    f"Ranked members: {sum(len(r) for r in levels.rankings.guilds.values())} ({len(levels.pending_xp)} waiting to be written)"
+                ),
+                inline=False
+            )
+
+        embed.set_footer(text="Full metrics are available in Prometheus format on the local /metrics endpoint.")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Stats(bot))
@@ -3,6 +3,8 @@ from discord import app_commands
 from discord.ext import commands
 import os
 
+from utils.metrics import registry as metrics
+
 secret_role = int(os.getenv('SECRET_ROLE'))
 
 class SecretAuth(commands.Cog):
@@ -33,6 +35,7 @@ class SecretAuth(commands.Cog):
         await ctx.send("This is a hybrid command!")
 
     @commands.Cog.listener()
+    @metrics.timed("listener_seconds", listener="SecretAuth.on_message")
     async def on_message(self, message):
         # Don't respond to ourselves
         if message.author == self.bot.user:
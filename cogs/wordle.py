@@ -1,28 +1,75 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from typing import List
+import asyncio
 import json
 import random
 import os
 
-DATA_FILE = "data/wordle_words.json"
+from utils.wordle_scoring import Board
+from utils.wordlist import WordBitmap, word_index
+
+DATA_DIR = "/app/data" if os.path.exists("/app/data") else "./data"
+
+# Possible answers (JSON list)
+DATA_FILE = os.path.join(DATA_DIR, "wordle_words.json")
+
+# Optional, much larger list of accepted guesses (one word per line). Answers are always accepted.
+# Without it any 5 letters are accepted.
+ALLOWED_FILE = os.path.join(DATA_DIR, "wordle_allowed.txt")
 
 class Wordle(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.words = self.load_words()
+        self.allowed_task = None # Loads the accepted-guesses dictionary, see get_allowed_guesses
 
-    def load_words(self) -> List[str]:
+    def load_words(self) -> tuple:
+        """Answers, upper-cased and deduplicated. A tuple, so random.choice is O(1) and it never changes."""
         if not os.path.exists(DATA_FILE):
             print(f"Warning: {DATA_FILE} not found. Using fallback list.")
-            return ["HORSE", "APPLE", "HEART"]
+            return ("HORSE", "APPLE", "HEART")
         try:
             with open(DATA_FILE, "r") as f:
-                return json.load(f)
+                words = {w.strip().upper() for w in json.load(f)}
+            return tuple(sorted(w for w in words if word_index(w) is not None))
         except Exception as e:
             print(f"Error loading words: {e}")
-            return ["HORSE"]
+            return ("HORSE",)
+
+    async def cog_load(self):
+        # The guess dictionary is built in a worker thread so it never delays startup
+        self.allowed_task = asyncio.create_task(self.load_allowed_guesses())
+
+    async def cog_unload(self):
+        if self.allowed_task:
+            self.allowed_task.cancel()
+
+    async def load_allowed_guesses(self):
+        """Reads ALLOWED_FILE into a WordBitmap. None if there is no file or it can't be read."""
+        if not os.path.exists(ALLOWED_FILE):
+            return None
+        try:
+            allowed = await asyncio.to_thread(WordBitmap.from_file, ALLOWED_FILE, self.words)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error loading allowed guesses: {e}")
+            return None
+        print(f"Wordle: Loaded {len(allowed)} allowed guesses.")
+        return allowed
+
+    async def get_allowed_guesses(self):
+        """
+        The accepted-guesses dictionary, None if there is none.
+        Everyone waits on the same load task, the file is only read once.
+        """
+        if self.allowed_task is None:
+            self.allowed_task = asyncio.create_task(self.load_allowed_guesses())
+        # Shielded: a guess whose interaction is cancelled must not cancel the shared load
+        return await asyncio.shield(self.allowed_task)
+
+    async def is_allowed_guess(self, guess: str) -> bool:
+        allowed = await self.get_allowed_guesses()
+        return allowed is None or guess in allowed
 
     @app_commands.command(name="wordle", description="Play a game of Wordle with a random word!")
     async def wordle_command(self, interaction: discord.Interaction):
@@ -31,34 +78,25 @@ class Wordle(commands.Cog):
              return
              
         target_word = random.choice(self.words)
-        view = WordleView(target_word)
+        view = WordleView(target_word, self)
         await interaction.response.send_message(embed=view.get_embed(), view=view)
 
 
 class WordleView(discord.ui.View):
-    def __init__(self, target_word: str):
+    def __init__(self, target_word: str, cog: Wordle = None):
         super().__init__(timeout=None)
+        self.cog = cog # for guess validation
         self.target_word = target_word.upper()
-        self.guesses: List[str] = []
+        self.board = Board(self.target_word)
         self.ended = False
 
     def get_embed(self) -> discord.Embed:
         embed = discord.Embed(title="Wordle", description="Guess the 5-letter word!", color=discord.Color.blue())
         
-        board_str = ""
-        for guess in self.guesses:
-            line = self.format_guess(guess)
-            board_str += line + "\n"
-        
-        # Determine how many empty rows are left
-        remaining_rows = 6 - len(self.guesses)
-        for _ in range(remaining_rows):
-            board_str += "⬛ ⬛ ⬛ ⬛ ⬛\n"
-            
-        embed.description = board_str
+        embed.description = self.board.render()
         
         if self.ended:
-            if self.guesses and self.guesses[-1] == self.target_word:
+            if self.board.solved:
                 embed.set_footer(text=f"You Won! The word was {self.target_word} 🎉")
                 embed.color = discord.Color.green()
             else:
@@ -67,36 +105,6 @@ class WordleView(discord.ui.View):
                 
         return embed
 
-    def format_guess(self, guess: str) -> str:
-        # Frequency counter for the target word to handle duplicates correctly
-        target_freq = {}
-        for char in self.target_word:
-            target_freq[char] = target_freq.get(char, 0) + 1
-            
-        result = [""] * 5
-        guess_upper = guess.upper()
-        
-        # First Pass: Green (Correct position)
-        for i in range(5):
-            letter = guess_upper[i]
-            if letter == self.target_word[i]:
-                result[i] = "🟩"
-                target_freq[letter] -= 1
-        
-        # Second Pass: Yellow (Wrong position but in word)
-        for i in range(5):
-            if result[i] != "":
-                continue
-                
-            letter = guess_upper[i]
-            if letter in target_freq and target_freq[letter] > 0:
-                result[i] = "🟨"
-                target_freq[letter] -= 1
-            else:
-                result[i] = "⬛"
-                
-        return " ".join(result)
-
     @discord.ui.button(label="Guess", style=discord.ButtonStyle.primary, emoji="❓")
     async def guess_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.ended:
@@ -147,17 +155,21 @@ class GuessModal(discord.ui.Modal, title="Enter your guess"):
             await interaction.response.send_message("Only letters are allowed!", ephemeral=True)
             return
 
-        # Add guess
-        self.game_view.guesses.append(guess)
+        if self.game_view.cog and not await self.game_view.cog.is_allowed_guess(guess):
+            await interaction.response.send_message(f"**{guess}** is not in the word list!", ephemeral=True)
+            return
+
+        # Score it and add its row to the board
+        self.game_view.board.add_guess(guess)
         
         # Check Win/Loss
-        if guess == self.game_view.target_word:
+        if self.game_view.board.solved:
             self.game_view.ended = True
             for child in self.game_view.children:
                 child.disabled = True
             self.game_view.stop()
             
-        elif len(self.game_view.guesses) >= 6:
+        elif self.game_view.board.full:
             self.game_view.ended = True
             for child in self.game_view.children:
                 child.disabled = True
@@ -0,0 +1,99 @@
+"""
+Runs the bot as several processes ("clusters"), each owning a slice of the shards.
+
+Every cluster is a normal `python main.py` started with SHARD_COUNT, SHARD_IDS
+and CLUSTER_ID set. Clusters that crash are restarted with a backoff; Ctrl+C
+(or SIGTERM) stops all of them.
+
+Usage:
+    python launcher.py --shards 8 --clusters 2
+    python launcher.py --shards 8 --clusters 2 --dry-run   # print the plan only
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+from utils.sharding import plan_clusters
+
+RESTART_BACKOFF_MAX = 60 # seconds
+HEALTHY_RUN = 300 # a cluster that ran this long gets its backoff reset
+
+
+def cluster_env(cluster_id: int, shard_ids: list, total_shards: int) -> dict:
+    env = dict(os.environ)
+    env["SHARD_COUNT"] = str(total_shards)
+    env["SHARD_IDS"] = ",".join(map(str, shard_ids))
+    env["CLUSTER_ID"] = str(cluster_id)
+    return env
+
+
+async def run_cluster(cluster_id: int, shard_ids: list, total_shards: int, stopping: asyncio.Event):
+    backoff = 1
+    loop = asyncio.get_running_loop()
+    while not stopping.is_set():
+        print(f"Launcher: starting cluster {cluster_id} (shards {shard_ids})")
+        started = loop.time()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "main.py", env=cluster_env(cluster_id, shard_ids, total_shards)
+        )
+
+        stop_wait = asyncio.create_task(stopping.wait())
+        exit_wait = asyncio.create_task(process.wait())
+        await asyncio.wait({stop_wait, exit_wait}, return_when=asyncio.FIRST_COMPLETED)
+
+        if stopping.is_set():
+            exit_wait.cancel()
+            if process.returncode is None:
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=15)
+                except asyncio.TimeoutError:
+                    process.kill()
+            print(f"Launcher: cluster {cluster_id} stopped")
+            return
+
+        stop_wait.cancel()
+        if loop.time() - started > HEALTHY_RUN:
+            backoff = 1
+        print(f"Launcher: cluster {cluster_id} exited with code {process.returncode}, restarting in {backoff}s")
+        try:
+            await asyncio.wait_for(stopping.wait(), timeout=backoff)
+        except asyncio.TimeoutError:
+            pass
+        backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run the bot as multiple sharded processes")
+    parser.add_argument("--shards", type=int, default=int(os.getenv("SHARD_COUNT", 0) or 1), help="Total shard count")
+    parser.add_argument("--clusters", type=int, default=1, help="Number of processes")
+    parser.add_argument("--dry-run", action="store_true", help="Print the shard plan and exit")
+    args = parser.parse_args()
+
+    plan = plan_clusters(args.shards, args.clusters)
+    for cluster_id, shard_ids in enumerate(plan):
+        print(f"Cluster {cluster_id}: shards {shard_ids} (metrics port offset +{cluster_id})")
+    if args.dry_run:
+        return
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError: # Windows
+            pass
+
+    await asyncio.gather(*(
+        run_cluster(cluster_id, shard_ids, args.shards, stopping)
+        for cluster_id, shard_ids in enumerate(plan)
+    ))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,59 @@
+"""
+Offline import/export of levels data, for migrations and backups.
+
+Runs against levels.db directly through the Levels cog (same ledger and level
+math as /level import and /level export), no Discord connection needed.
+Stop the bot first, or its in-memory caches won't see the imported XP.
+
+Usage:
+    python levels_cli.py export --guild 1234 levels.csv
+    python levels_cli.py import --guild 1234 mee6.json [--add]
+    python levels_cli.py import --guild 1234 levels.csv --db ./data/levels.db
+"""
+import argparse
+import asyncio
+import time
+
+import cogs.levels as levels
+from utils import levels_io
+
+
+async def run(args):
+    if args.db:
+        levels.DB_FILE = args.db
+    fmt = args.format or levels_io.detect_format(args.file)
+    if args.command == "export" and fmt not in levels_io.FORMATS:
+        raise SystemExit("Export writes .csv or .jsonl files.")
+
+    cog = levels.Levels(bot=None)
+    await cog.cog_load()
+    try:
+        start = time.perf_counter()
+        if args.command == "export":
+            count = await cog.admin_export_guild(args.guild, args.file, fmt)
+            print(f"Exported {count} member(s) to {args.file} in {time.perf_counter() - start:.1f}s")
+        else:
+            result = await cog.admin_import_guild(args.guild, args.file, fmt, replace=not args.add)
+            print(f"Imported {result['rows']} row(s), {result['changed']} member(s) changed, in {time.perf_counter() - start:.1f}s")
+    finally:
+        await cog.cog_unload()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export levels data as CSV/JSONL")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("file", help="Path of the .csv, .jsonl or .json file (.json is import only)")
+    parser.add_argument("--guild", type=int, required=True, help="Server ID")
+    parser.add_argument("--format", choices=levels_io.IMPORT_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--add", action="store_true", help="Import: add the XP on top instead of replacing it")
+    parser.add_argument("--db", help=f"Database file (default: {levels.DB_FILE})")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except levels_io.ImportFormatError as e:
+        raise SystemExit(f"Nothing was imported. {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Local stand-in for the Discord gateway, to test the sharded runtime without a connection.
+
+Starts the same cluster plan as launcher.py, one process per cluster, but each
+process gets a fake bot with its cluster's shard ids instead of a gateway
+connection. Every process generates the same synthetic traffic and keeps only
+messages for guilds on its own shards, routed exactly like Discord does
+((guild_id >> 22) % shard_count). All processes share one temporary levels.db
+and roles.db, start at the same moment (racing the migrations and the
+roles.json import) and flush XP concurrently.
+
+At the end it checks that:
+- every message was handled by exactly one cluster, and guilds never span clusters
+- the XP in levels.db adds up to what was sent
+- roles.json was imported exactly once
+
+Usage:
+    python local_cluster.py --shards 8 --clusters 4
+    python local_cluster.py --shards 16 --clusters 4 --guilds 100 --messages 50000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import traceback
+
+import cogs.levels as levels
+import cogs.roles as roles
+from bench_levels import FakeChannel, FakeGuild, FakeMember, FakeMessage
+from launcher import cluster_env
+from utils import sharding
+from utils.sharding import plan_clusters
+
+XP_RATE = 10
+
+# Written to the shared data dir, every cluster tries to import it at startup
+ROLES_JSON = {
+    "categories": [
+        {"name": "Colors", "is_exclusive": True, "roles": [{"id": 11, "label": "Red"}, {"id": 12, "label": "Blue"}]},
+        {"name": "Hobbies", "is_exclusive": False, "roles": [{"id": 21, "label": "Gaming"}]},
+    ]
+}
+
+
+class FakeShardedBot:
+    """What the cogs read from an AutoShardedBot, without a gateway connection."""
+
+    def __init__(self, shard_count: int, shard_ids: list):
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+    def get_guild(self, guild_id: int):
+        return None
+
+
+def guild_ids(count: int) -> list:
+    # Consecutive values above the timestamp bits, so guilds spread evenly over the shards
+    return [(i + 1) << 22 for i in range(count)]
+
+
+def generate_traffic(seed: int, messages: int, guilds: int, users: int) -> list:
+    """(guild_id, user_id) per message. Same seed, same traffic in every process."""
+    rng = random.Random(seed)
+    ids = guild_ids(guilds)
+    return [(rng.choice(ids), 10_000 + rng.randrange(users)) for _ in range(messages)]
+
+
+# --- One cluster ---
+
+async def run_worker(args) -> dict:
+    shard_count = int(os.environ["SHARD_COUNT"])
+    shard_ids = [int(s) for s in os.environ["SHARD_IDS"].split(",")]
+    bot = FakeShardedBot(shard_count, shard_ids)
+
+    levels.DB_FILE = os.path.join(args.data, "levels.db")
+    levels.XP_FLUSH_THRESHOLD = 20 # flush often, so clusters write at the same time
+    roles.ROLES_DB_FILE = os.path.join(args.data, "roles.db")
+    roles.ROLES_FILE = os.path.join(args.data, "roles.json")
+
+    levels_cog = levels.Levels(bot)
+    roles_cog = roles.Roles(bot)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await levels_cog.cog_load()
+        await roles_cog.cog_load()
+
+    fake_guilds = {}
+    channel = FakeChannel(1)
+    handled = 0
+    for guild_id, user_id in generate_traffic(args.seed, args.messages, args.guilds, args.users):
+        # The gateway only delivers events for guilds on this process's shards
+        if not sharding.owns_guild(bot, guild_id):
+            continue
+        guild = fake_guilds.get(guild_id)
+        if guild is None:
+            guild = fake_guilds[guild_id] = FakeGuild(guild_id)
+            levels_cog.guild_settings[guild_id] = {"xp_rate": XP_RATE, "xp_cooldown": 0}
+        await levels_cog.on_message(FakeMessage(FakeMember(user_id, guild), channel))
+        handled += 1
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        await levels_cog.cog_unload()
+        await roles_cog.cog_unload()
+    return {"handled": handled, "guilds": sorted(levels_cog.rankings.guilds)}
+
+
+# --- Coordinator ---
+
+async def run_local(args) -> bool:
+    plan = plan_clusters(args.shards, args.clusters)
+    data = tempfile.mkdtemp(prefix="local_cluster_")
+    with open(os.path.join(data, "roles.json"), "w") as f:
+        json.dump(ROLES_JSON, f)
+
+    processes = []
+    for cluster_id, shard_ids in enumerate(plan):
+        env = cluster_env(cluster_id, shard_ids, args.shards)
+        env["GUILD_ID"] = str(guild_ids(1)[0])
+        command = [
+            sys.executable, os.path.abspath(__file__), "--worker", "--data", data,
+            "--messages", str(args.messages), "--guilds", str(args.guilds),
+            "--users", str(args.users), "--seed", str(args.seed),
+        ]
+        processes.append(await asyncio.create_subprocess_exec(*command, env=env, stdout=asyncio.subprocess.PIPE))
+    outputs = await asyncio.gather(*(p.communicate() for p in processes))
+
+    ok = True
+    results = []
+    for cluster_id, (process, (stdout, _)) in enumerate(zip(processes, outputs)):
+        if process.returncode != 0:
+            print(f"Cluster {cluster_id}: exited with code {process.returncode}")
+            ok = False
+            continue
+        result = json.loads(stdout.decode().strip().splitlines()[-1])
+        results.append(result)
+        print(f"Cluster {cluster_id}: shards {plan[cluster_id]}, {result['handled']} messages, {len(result['guilds'])} guilds")
+    if not ok:
+        return False
+
+    def check(passed: bool, text: str):
+        nonlocal ok
+        print(f"{'PASS' if passed else 'FAIL'}: {text}")
+        ok = ok and passed
+
+    handled = sum(r["handled"] for r in results)
+    check(handled == args.messages, f"{handled}/{args.messages} messages handled exactly once")
+
+    seen = [guild for r in results for guild in r["guilds"]]
+    check(len(seen) == len(set(seen)), "every guild lives in a single cluster")
+
+    with sqlite3.connect(os.path.join(data, "levels.db")) as db:
+        total_xp = db.execute("SELECT COALESCE(SUM(xp), 0) FROM users").fetchone()[0]
+        ledger_xp = db.execute("SELECT COALESCE(SUM(amount), 0) FROM xp_events").fetchone()[0]
+        version = db.execute("SELECT MAX(version), COUNT(*) FROM schema_version").fetchone()
+    expected = args.messages * XP_RATE
+    check(total_xp == expected and ledger_xp == expected, f"levels.db holds {total_xp} XP ({ledger_xp} in the ledger), expected {expected}")
+    check(version[0] == version[1] == len(levels.levels_db.MIGRATIONS), "each levels.db migration applied once")
+
+    with sqlite3.connect(os.path.join(data, "roles.db")) as db:
+        categories = db.execute("SELECT COUNT(*) FROM role_categories").fetchone()[0]
+        menu_roles = db.execute("SELECT COUNT(*) FROM menu_roles").fetchone()[0]
+    expected_roles = sum(len(c["roles"]) for c in ROLES_JSON["categories"])
+    check(
+        categories == len(ROLES_JSON["categories"]) and menu_roles == expected_roles
+        and not os.path.exists(os.path.join(data, "roles.json")),
+        f"roles.json imported once ({categories} categories, {menu_roles} roles)"
+    )
+
+    print(f"Data left in {data}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cluster plan locally against a fake gateway")
+    parser.add_argument("--shards", type=int, default=4, help="Total shard count")
+    parser.add_argument("--clusters", type=int, default=2, help="Number of processes")
+    parser.add_argument("--guilds", type=int, default=40)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        try:
+            print(json.dumps(asyncio.run(run_worker(args))))
+        except Exception:
+            # The open aiosqlite threads would keep a crashed worker alive, exit hard
+            # so the coordinator sees the failure instead of waiting forever
+            traceback.print_exc()
+            sys.stdout.flush()
+            os._exit(1)
+        return
+    if not asyncio.run(run_local(args)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
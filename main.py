@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import random
+import time
 
 import discord
 import discord.utils
@@ -9,6 +10,9 @@ from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 
+from utils import metrics
+from utils.metrics import registry
+
 
 load_dotenv()
 token = os.getenv('DISCORD_TOKEN')
@@ -17,20 +21,73 @@ secret_role = os.getenv('SECRET_ROLE')
 owner_id = os.getenv('OWNER_ID')
 guild_id = int(os.getenv('GUILD_ID'))
 suggestion_channel_id = int(os.getenv('SUGGESTION_CHANNEL_ID'))
-
-handler = logging.FileHandler(filename='discord.log', encoding='utf-8', mode='w')
+metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+metrics_port = int(os.getenv('METRICS_PORT', 9108)) # 0 disables the /metrics endpoint
+
+# Sharding (see launcher.py). SHARD_COUNT=0 runs a single unsharded bot.
+# SHARD_IDS picks the shards this process runs (comma separated, default: all of them),
+# CLUSTER_ID tells processes apart for logs, metrics and one-time startup work.
+shard_count = int(os.getenv('SHARD_COUNT', 0))
+shard_ids = [int(s) for s in os.getenv('SHARD_IDS', '').split(',') if s.strip()] or None
+cluster_id = int(os.getenv('CLUSTER_ID', 0))
+if metrics_port:
+    metrics_port += cluster_id # one endpoint per cluster
+
+log_file = 'discord.log' if cluster_id == 0 else f'discord-cluster{cluster_id}.log'
+handler = logging.FileHandler(filename=log_file, encoding='utf-8', mode='w')
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='/', intents=intents)
+###
+### Command Metrics ###
+###
+class MetricsTree(app_commands.CommandTree):
+    """Command tree that times every app command (see utils/metrics.py)."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras['metrics_start'] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        record_command_time(interaction, interaction.command, error=True)
+        await super().on_error(interaction, error)
+
+
+def record_command_time(interaction, command, error=False):
+    start = interaction.extras.get('metrics_start')
+    name = command.qualified_name if command else "unknown"
+    if start is not None:
+        registry.observe("app_command_seconds", time.perf_counter() - start, command=name)
+    if error:
+        registry.inc("app_command_errors_total", command=name)
+
+
+if shard_count:
+    bot = commands.AutoShardedBot(
+        command_prefix='/', intents=intents, tree_cls=MetricsTree,
+        shard_count=shard_count, shard_ids=shard_ids
+    )
+else:
+    bot = commands.Bot(command_prefix='/', intents=intents, tree_cls=MetricsTree)
+
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    record_command_time(interaction, command)
 
 ###
 ### Bot Startup Commands ###
 ###
 @bot.event
 async def on_ready():
-    print(f'Logged in as {bot.user}')
+    # Plain commands.Bot (SHARD_COUNT=0) has no shard_ids
+    print(f'Logged in as {bot.user} (cluster {cluster_id}, shards {getattr(bot, "shard_ids", None) or "all"})')
+
+    # Commands are global to the application, only one cluster needs to sync them
+    if cluster_id != 0:
+        return
+
     try:
         # Prevent Duplicate Commands (Global vs Guild)
         # We will sync ONLY to the specific guild for development (updates are instant)
@@ -68,6 +125,7 @@ async def on_ready():
 ### Member Events ###
 ###
 @bot.event
+@registry.timed("listener_seconds", listener="on_member_join")
 async def on_member_join(member):
     channel = bot.get_channel(channel_id)
     if channel:
@@ -174,9 +232,19 @@ async def main():
 
     discord.utils.setup_logging(handler=handler, level=logging.DEBUG)
 
-    async with bot:
-        await load()
-        await bot.start(token)
+    # Local Prometheus endpoint (GET /metrics)
+    metrics_runner = None
+    if metrics_port:
+        metrics_runner = await metrics.start_http_server(metrics_host, metrics_port)
+        print(f"Metrics available at http://{metrics_host}:{metrics_port}/metrics")
+
+    try:
+        async with bot:
+            await load()
+            await bot.start(token)
+    finally:
+        if metrics_runner:
+            await metrics_runner.cleanup()
 
 
 
@@ -0,0 +1,80 @@
+"""
+Per-channel outbound announcement queue.
+
+Events pushed for a channel are held for `window` seconds and then sent
+together by a background task, so the code that pushes them never waits
+on Discord. `render(events)` turns the batch into message contents.
+"""
+import asyncio
+
+import discord
+
+# Discord's message length limit
+MAX_MESSAGE_LENGTH = 2000
+
+
+def join_names(names: list) -> str:
+    """["A"] -> "A", ["A", "B", "C"] -> "A, B and C" """
+    if len(names) <= 1:
+        return "".join(names)
+    return ", ".join(names[:-1]) + " and " + names[-1]
+
+
+def pack_lines(lines: list) -> list:
+    """Joins lines into as few messages as possible without going over the length limit."""
+    messages = []
+    current = ""
+    for line in lines:
+        line = line[:MAX_MESSAGE_LENGTH]
+        if current and len(current) + 1 + len(line) > MAX_MESSAGE_LENGTH:
+            messages.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        messages.append(current)
+    return messages
+
+
+class AnnouncementQueue:
+    def __init__(self, render, window: float = 1.5):
+        self.render = render
+        self.window = window
+        self.pending = {} # channel_id -> (channel, [events])
+        self.tasks = {} # channel_id -> drain task waiting for its window to close
+
+    def push(self, channel, event):
+        """Queues an event for `channel`. Never blocks."""
+        entry = self.pending.get(channel.id)
+        if entry is None:
+            entry = self.pending[channel.id] = (channel, [])
+        entry[1].append(event)
+
+        if channel.id not in self.tasks:
+            self.tasks[channel.id] = asyncio.create_task(self.drain_later(channel.id))
+
+    async def drain_later(self, channel_id: int):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self.tasks.pop(channel_id, None)
+        await self.drain(channel_id)
+
+    async def drain(self, channel_id: int):
+        entry = self.pending.pop(channel_id, None)
+        if entry is None:
+            return
+        channel, events = entry
+        for content in pack_lines(self.render(events)):
+            try:
+                await channel.send(content)
+            except discord.HTTPException as e:
+                print(f"Announcements: Could not send to channel {channel_id}. ({e})")
+
+    async def close(self):
+        """Cancels the timers and sends everything still pending right away."""
+        for task in list(self.tasks.values()):
+            task.cancel()
+        self.tasks.clear()
+        for channel_id in list(self.pending):
+            await self.drain(channel_id)
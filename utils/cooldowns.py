@@ -0,0 +1,69 @@
+"""
+Bounded cooldown store for per-(guild, user) XP cooldowns.
+
+Entries are grouped into expiry buckets of `granularity` seconds. Every call
+drops the buckets whose window has fully passed, so memory only holds users
+that are still on cooldown, not everyone the bot has ever seen.
+"""
+import heapq
+import time
+
+
+class CooldownStore:
+    def __init__(self, granularity: float = 1.0):
+        self.granularity = granularity
+        self.expiry = {}  # key -> timestamp when the cooldown ends
+        self.buckets = {}  # bucket index -> keys expiring inside it
+        self.bucket_heap = []  # bucket indexes, oldest first
+
+    def __len__(self) -> int:
+        return len(self.expiry)
+
+    @property
+    def size(self) -> int:
+        """Number of keys currently on cooldown (for monitoring)."""
+        return len(self.expiry)
+
+    def sweep(self, now: float = None):
+        """Evicts every entry whose cooldown has ended."""
+        now = time.time() if now is None else now
+        while self.bucket_heap and self.bucket_heap[0] * self.granularity <= now:
+            index = heapq.heappop(self.bucket_heap)
+            for key in self.buckets.pop(index, ()):
+                # The key may have been renewed into a later bucket since
+                if self.expiry.get(key, now) <= now:
+                    self.expiry.pop(key, None)
+
+    def is_on_cooldown(self, key, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        return self.expiry.get(key, 0) > now
+
+    def try_acquire(self, key, cooldown: float, now: float = None) -> bool:
+        """
+        Returns False if `key` is still on cooldown.
+        Otherwise starts a new cooldown of `cooldown` seconds and returns True.
+        """
+        now = time.time() if now is None else now
+        self.sweep(now)
+
+        if self.is_on_cooldown(key, now):
+            return False
+        if cooldown <= 0:
+            return True
+
+        expires_at = now + cooldown
+        self.expiry[key] = expires_at
+
+        # Bucket N holds keys expiring before N * granularity
+        index = int(expires_at // self.granularity) + 1
+        bucket = self.buckets.get(index)
+        if bucket is None:
+            bucket = self.buckets[index] = []
+            heapq.heappush(self.bucket_heap, index)
+        bucket.append(key)
+        return True
+
+    def clear(self):
+        self.expiry.clear()
+        self.buckets.clear()
+        self.bucket_heap.clear()
@@ -0,0 +1,65 @@
+"""
+Level curve used by the Levels cog (MEE6 formula).
+
+Reaching level L+1 from level L costs 5*L^2 + 50*L + 100 XP, starting at L=0.
+The cumulative sum has a closed form, so every lookup here is O(1):
+
+    total_xp_for_level(L) = (10*L^3 + 135*L^2 + 455*L) / 6
+"""
+import math
+
+
+def xp_for_next_level(level: int) -> int:
+    """XP needed to go from `level` to `level + 1`."""
+    return 5 * (level ** 2) + 50 * level + 100
+
+
+def total_xp_for_level(level: int) -> int:
+    """TOTAL cumulative XP required to reach `level` (level 0 needs 0 XP)."""
+    if level <= 0:
+        return 0
+    # Always divisible by 6, so integer division is exact
+    return (10 * level ** 3 + 135 * level ** 2 + 455 * level) // 6
+
+
+def level_from_xp(xp: int) -> int:
+    """Highest level whose cumulative requirement is <= xp."""
+    if xp < 100:
+        return 0
+
+    # (5/3)(L + 4.5)^3 is a close upper approximation of the cumulative curve,
+    # so inverting it lands within a step or two of the real answer.
+    level = max(0, int(round(math.pow(xp * 0.6, 1 / 3) - 4.5)))
+
+    # Exact integer correction (bounded, a couple of iterations at most)
+    while total_xp_for_level(level) > xp:
+        level -= 1
+    while total_xp_for_level(level + 1) <= xp:
+        level += 1
+    return level
+
+
+# Members never go below level 1, even with less XP than level 1 needs.
+# Every Python and SQL path that stores a level uses member_level() so they all agree.
+MIN_LEVEL = 1
+
+
+def member_level(xp: int) -> int:
+    """A member's level for `xp`: level_from_xp, floored at MIN_LEVEL."""
+    return max(MIN_LEVEL, level_from_xp(xp))
+
+
+def level_start_xp(level: int) -> int:
+    """XP at which a member is at `level`. MIN_LEVEL starts at 0 XP, since members start there."""
+    if level <= MIN_LEVEL:
+        return 0
+    return total_xp_for_level(level)
+
+
+def level_progress(xp: int, level: int) -> tuple:
+    """
+    Returns (xp gained within `level`, xp needed to get from the start of `level` to the next).
+    At MIN_LEVEL this is measured from 0 XP, e.g. 0..255 for level 1.
+    """
+    start = level_start_xp(level)
+    return xp - start, total_xp_for_level(level + 1) - start
@@ -0,0 +1,334 @@
+"""
+Storage layer for levels.db: connection tuning, a read-only connection pool
+and versioned schema migrations.
+
+Migrations run in order at startup. Each one is recorded in `schema_version`
+and only runs once. They are also written to be idempotent, so databases
+created before versioning existed are picked up safely from version 0.
+Several bot processes can share the files (see launcher.py), so migrations
+take the write lock up front and re-check the version once they hold it.
+"""
+import asyncio
+import os
+import pathlib
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from utils import level_curve
+from utils.metrics import instrument_connection
+
+# Applied to every connection.
+# WAL lets readers work while a write is in progress, and with WAL
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit.
+# busy_timeout comes first: switching a new file to WAL needs a lock, and
+# clusters starting together would otherwise fail instead of waiting.
+PRAGMAS = [
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000", # ~20 MB page cache (negative = KiB)
+    "PRAGMA mmap_size = 268435456", # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+]
+
+# How long a starting process waits for another one's migrations, in seconds
+MIGRATION_LOCK_WAIT = 300
+# How long a write transaction waits for another process's, in seconds.
+# busy_timeout alone gives up after 5s, a big /level import holds the lock longer than that.
+WRITE_LOCK_WAIT = 60
+
+
+async def connect(path: str) -> aiosqlite.Connection:
+    """Opens the database with the performance profile above and Row results."""
+    db_dir = os.path.dirname(path)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+
+    db = instrument_connection(await aiosqlite.connect(path), "levels_writer")
+    # Enable row factory to get results as accessible objects/dicts instead of just tuples
+    db.row_factory = aiosqlite.Row
+    for pragma in PRAGMAS:
+        await db.execute(pragma)
+
+    # Level curve as SQL functions, so bulk fixes run as one UPDATE inside SQLite
+    await db.create_function("level_from_xp", 1, level_curve.level_from_xp, deterministic=True)
+    await db.create_function("xp_for_level", 1, level_curve.total_xp_for_level, deterministic=True)
+    await db.create_function("member_level", 1, level_curve.member_level, deterministic=True)
+    return db
+
+
+async def connect_reader(path: str) -> aiosqlite.Connection:
+    """
+    Opens a read-only connection. With WAL, readers see the last committed data
+    and never wait behind the writer connection.
+    """
+    uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+    db = instrument_connection(await aiosqlite.connect(uri, uri=True), "levels_reader")
+    db.row_factory = aiosqlite.Row
+    # journal_mode is a property of the file, already set by the writer
+    for pragma in PRAGMAS:
+        if "journal_mode" not in pragma:
+            await db.execute(pragma)
+    await db.execute("PRAGMA query_only = 1")
+    return db
+
+
+class ReaderPool:
+    """
+    A small pool of read-only connections for commands that only read.
+    Mutations must keep going through the single writer connection.
+    """
+    def __init__(self, connections):
+        self.connections = connections
+        self.available = asyncio.Queue()
+        for db in connections:
+            self.available.put_nowait(db)
+
+    @classmethod
+    async def open(cls, path: str, size: int = 2):
+        return cls([await connect_reader(path) for _ in range(size)])
+
+    @asynccontextmanager
+    async def acquire(self):
+        db = await self.available.get()
+        try:
+            yield db
+        finally:
+            self.available.put_nowait(db)
+
+    async def fetchall(self, sql: str, params=()) -> list:
+        async with self.acquire() as db:
+            async with db.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    async def fetchone(self, sql: str, params=()):
+        async with self.acquire() as db:
+            async with db.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def close(self):
+        for db in self.connections:
+            await db.close()
+
+
+async def column_exists(db, table: str, column: str) -> bool:
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        return any(row[1] == column for row in await cursor.fetchall())
+
+
+# --- Migrations ---
+
+async def migration_base_tables(db):
+    # users:
+    #   user_id: The Discord User ID
+    #   guild_id: The Server ID (composite primary key with user_id)
+    #   xp: Total experience points
+    #   level: Current level
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER,
+            guild_id INTEGER,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 1,
+            PRIMARY KEY (user_id, guild_id)
+        )
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS level_rewards (
+            guild_id INTEGER,
+            level INTEGER,
+            role_id INTEGER,
+            PRIMARY KEY (guild_id, level)
+        )
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            xp_rate INTEGER DEFAULT 10,
+            xp_cooldown INTEGER DEFAULT 10
+        )
+    """)
+
+
+async def migration_xp_cooldown(db):
+    # Older databases created guild_settings without xp_cooldown
+    if not await column_exists(db, "guild_settings", "xp_cooldown"):
+        await db.execute("ALTER TABLE guild_settings ADD COLUMN xp_cooldown INTEGER DEFAULT 10")
+
+
+async def migration_sync_checkpoints(db):
+    # Last backfilled message per channel for /sync_xp
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS sync_checkpoints (
+            channel_id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            last_message_id INTEGER
+        )
+    """)
+
+
+async def migration_leaderboard_index(db):
+    # Covering index for the paginated leaderboard (keyset on xp, user_id)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_guild_xp
+        ON users (guild_id, xp DESC, user_id, level)
+    """)
+
+
+async def migration_reward_reconcile(db):
+    # Reward role reconciliation: resumable job per guild, and roles that stopped being rewards
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS reward_reconcile_jobs (
+            guild_id INTEGER PRIMARY KEY,
+            last_user_id INTEGER DEFAULT 0
+        )
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS retired_reward_roles (
+            guild_id INTEGER,
+            role_id INTEGER,
+            PRIMARY KEY (guild_id, role_id)
+        )
+    """)
+
+
+async def migration_xp_ledger(db):
+    # Append-only XP ledger. users becomes a snapshot that the compactor keeps up to date:
+    # every event with id <= xp_ledger_state.compacted_through is already included in users.xp.
+    #   source: message, backfill, admin, import or opening (balance carried over from older history)
+    #   actor_id: the admin who made the change, for admin events
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS xp_events (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            user_id INTEGER,
+            source TEXT,
+            amount INTEGER,
+            actor_id INTEGER,
+            created_at INTEGER
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_xp_events_member ON xp_events (guild_id, user_id, id)")
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS xp_ledger_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            compacted_through INTEGER
+        )
+    """)
+
+    async with db.execute("SELECT 1 FROM xp_ledger_state") as cursor:
+        if await cursor.fetchone():
+            return
+    # Seed the ledger with everyone's current XP, so replaying it always gives back users.xp
+    await db.execute("""
+        INSERT INTO xp_events (guild_id, user_id, source, amount, created_at)
+        SELECT guild_id, user_id, 'opening', xp, strftime('%s', 'now') FROM users WHERE xp != 0
+    """)
+    await db.execute("INSERT INTO xp_ledger_state (id, compacted_through) SELECT 1, COALESCE(MAX(id), 0) FROM xp_events")
+
+
+async def migration_xp_buckets(db):
+    # Chat XP per member per time bucket, for the daily/weekly/monthly leaderboards.
+    #   period: daily, weekly or monthly
+    #   bucket_start: unix time the bucket starts at (UTC)
+    # Filled when the ledger is folded, old buckets are pruned.
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS xp_buckets (
+            guild_id INTEGER,
+            period TEXT,
+            bucket_start INTEGER,
+            user_id INTEGER,
+            xp INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, period, bucket_start, user_id)
+        )
+    """)
+    # Same keyset pagination as idx_users_guild_xp, inside one bucket
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_xp_buckets_rank
+        ON xp_buckets (guild_id, period, bucket_start, xp DESC, user_id)
+    """)
+
+
+async def migration_xp_events_created(db):
+    # XP history squashing looks up events older than a cutoff
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_xp_events_created ON xp_events (created_at)")
+
+
+# (version, description, function). Append only, never reorder or edit applied ones.
+MIGRATIONS = [
+    (1, "base tables", migration_base_tables),
+    (2, "guild_settings.xp_cooldown", migration_xp_cooldown),
+    (3, "sync_checkpoints table", migration_sync_checkpoints),
+    (4, "leaderboard covering index", migration_leaderboard_index),
+    (5, "reward reconciliation tables", migration_reward_reconcile),
+    (6, "xp_events ledger", migration_xp_ledger),
+    (7, "xp_buckets for time-windowed leaderboards", migration_xp_buckets),
+    (8, "xp_events created_at index", migration_xp_events_created),
+]
+
+
+async def get_schema_version(db) -> int:
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at INTEGER DEFAULT (strftime('%s', 'now'))
+        )
+    """)
+    async with db.execute("SELECT MAX(version) FROM schema_version") as cursor:
+        row = await cursor.fetchone()
+        return row[0] or 0
+
+
+async def begin_immediate(db, wait: float = MIGRATION_LOCK_WAIT):
+    """
+    BEGIN IMMEDIATE, retried for up to `wait` seconds. Each attempt already waits busy_timeout,
+    this covers another process holding the write lock for longer (e.g. a big migration).
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() > deadline:
+                raise
+
+
+async def migrate(db, migrations: list = MIGRATIONS) -> list:
+    """
+    Applies every pending migration, each in its own transaction. Returns the versions applied.
+    Other databases (e.g. utils/roles_db.py) pass their own migration list.
+
+    Each migration runs under BEGIN IMMEDIATE and the version is read again inside it,
+    so when several processes start at once exactly one applies it and the others skip it.
+    """
+    await begin_immediate(db)
+    try:
+        current = await get_schema_version(db)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+    applied = []
+    for version, description, migration in migrations:
+        if version <= current:
+            continue
+        await begin_immediate(db)
+        try:
+            # Another process may have applied it while we waited for the lock
+            if await get_schema_version(db) >= version:
+                await db.rollback()
+                continue
+            await migration(db)
+            await db.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+        applied.append(version)
+    return applied
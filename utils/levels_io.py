@@ -0,0 +1,184 @@
+"""
+Streaming import/export of levels data as CSV or JSONL.
+
+Rows are (user_id, xp). Levels are never trusted from a file, they are
+recomputed from XP on import. Column names from other bots are accepted,
+e.g. MEE6 leaderboard dumps use `id` instead of `user_id`.
+
+Everything works on file objects chunk by chunk, so memory stays flat no
+matter how big the guild is. The one exception is importing a plain .json
+file (a JSON array, or an object like MEE6's {"players": [...]}), which has
+to be parsed whole.
+"""
+import csv
+import json
+import os
+
+CHUNK_SIZE = 5000
+
+FORMATS = ("csv", "jsonl")
+# .json can only be imported, export writes JSONL
+IMPORT_FORMATS = FORMATS + ("json",)
+
+# Keys holding the member list when a .json file is an object instead of an array
+JSON_LIST_KEYS = ("players", "members", "users", "leaderboard")
+
+# SQLite INTEGER is a signed 64-bit value
+MAX_SQL_INT = 2**63 - 1
+
+# Accepted column names, first match wins
+USER_ID_KEYS = ("user_id", "id", "userid", "member_id", "discord_id")
+XP_KEYS = ("xp", "exp", "experience", "total_xp")
+
+EXPORT_COLUMNS = ("user_id", "xp", "level")
+
+
+class ImportFormatError(ValueError):
+    """The file can't be read as levels data (unknown format, missing columns, bad values)."""
+
+
+def detect_format(filename: str) -> str:
+    """csv, jsonl or json, from the file extension (.ndjson counts as JSONL)."""
+    ext = os.path.splitext(filename)[1].lower().lstrip(".")
+    if ext == "csv":
+        return "csv"
+    if ext in ("jsonl", "ndjson"):
+        return "jsonl"
+    if ext == "json":
+        return "json"
+    raise ImportFormatError(f"Unsupported file type '.{ext}', use .csv, .jsonl or .json")
+
+
+def pick_key(keys, candidates, what: str) -> str:
+    lowered = {k.strip().lower(): k for k in keys}
+    for name in candidates:
+        if name in lowered:
+            return lowered[name]
+    raise ImportFormatError(f"No {what} column found (expected one of: {', '.join(candidates)})")
+
+
+def parse_row(record, id_key, xp_key, where: str) -> tuple:
+    """
+    `record` is a dict (JSON) or a list (CSV, keys are column indexes).
+    `where` names the row in error messages, e.g. "Line 12".
+    """
+    try:
+        user_id = int(record[id_key])
+        raw_xp = record[xp_key]
+        try:
+            xp = int(raw_xp)
+        except ValueError:
+            xp = int(float(raw_xp)) # "1200.0", "1.2e3"
+    # OverflowError: "1e400" is infinite as a float
+    except (KeyError, IndexError, TypeError, ValueError, OverflowError):
+        raise ImportFormatError(f"{where}: invalid user ID or XP")
+    # Checked here, SQLite would only fail halfway through the import
+    if not 0 < user_id <= MAX_SQL_INT:
+        raise ImportFormatError(f"{where}: user ID out of range")
+    if xp < 0:
+        raise ImportFormatError(f"{where}: negative XP")
+    if xp > MAX_SQL_INT:
+        raise ImportFormatError(f"{where}: XP too large")
+    return user_id, xp
+
+
+def iter_rows(fh, fmt: str):
+    """Yields (user_id, xp) from a text file object, one row at a time."""
+    if fmt == "csv":
+        # Plain reader + column indexes, noticeably faster than DictReader on big files
+        reader = csv.reader(fh)
+        header = next(reader, None)
+        if not header:
+            return
+        id_index = header.index(pick_key(header, USER_ID_KEYS, "user ID"))
+        xp_index = header.index(pick_key(header, XP_KEYS, "XP"))
+        for record in reader:
+            if record:
+                yield parse_row(record, id_index, xp_index, f"Line {reader.line_num}")
+        return
+
+    if fmt == "json":
+        yield from iter_json_rows(fh)
+        return
+    yield from iter_records(iter_jsonl(fh))
+
+
+def iter_jsonl(lines):
+    """Decodes one JSON value per line, yields ("Line n", value). Blank lines are skipped."""
+    for line, text in enumerate(lines, 1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            yield f"Line {line}", json.loads(text)
+        except json.JSONDecodeError:
+            raise ImportFormatError(f"Line {line}: not valid JSON")
+
+
+def iter_records(items):
+    """Yields (user_id, xp) from (where, record) pairs. Columns are picked from the first record."""
+    id_key = xp_key = None
+    for where, record in items:
+        if not isinstance(record, dict):
+            raise ImportFormatError(f"{where}: expected a JSON object")
+        if id_key is None:
+            id_key = pick_key(record, USER_ID_KEYS, "user ID")
+            xp_key = pick_key(record, XP_KEYS, "XP")
+        yield parse_row(record, id_key, xp_key, where)
+
+
+def iter_json_rows(fh):
+    """
+    Rows from a .json file: an array of member objects, an object wrapping one
+    (see JSON_LIST_KEYS), or JSONL that was saved with a .json extension.
+    """
+    text = fh.read()
+    if not text.strip():
+        return
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        if e.msg != "Extra data":
+            raise ImportFormatError(f"Line {e.lineno}: not valid JSON")
+        # More than one top-level value, i.e. one object per line
+        yield from iter_records(iter_jsonl(text.splitlines()))
+        return
+
+    if isinstance(data, dict):
+        members = next((data[k] for k in JSON_LIST_KEYS if isinstance(data.get(k), list)), None)
+        # A single member object on its own
+        data = [data] if members is None else members
+    if not isinstance(data, list):
+        raise ImportFormatError("Expected a JSON array of members")
+    yield from iter_records((f"Entry {i}", record) for i, record in enumerate(data, 1))
+
+
+def iter_chunks(fh, fmt: str, size: int = CHUNK_SIZE):
+    """Yields lists of up to `size` (user_id, xp) rows."""
+    chunk = []
+    for row in iter_rows(fh, fmt):
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class RowWriter:
+    """Writes (user_id, xp, level) rows to a text file object in the chosen format."""
+
+    def __init__(self, fh, fmt: str):
+        self.fh = fh
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "csv":
+            self.csv = csv.writer(fh)
+            self.csv.writerow(EXPORT_COLUMNS)
+
+    def write_rows(self, rows):
+        if self.fmt == "csv":
+            self.csv.writerows(rows)
+        else:
+            self.fh.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows)
+        self.count += len(rows)
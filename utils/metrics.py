@@ -0,0 +1,183 @@
+"""
+In-memory metrics: counters and latency histograms.
+
+Everything records into the module-level `registry`. It can be scraped in
+Prometheus text format from a small local HTTP endpoint (start_http_server)
+and is summarised by the admin-only /stats command.
+"""
+import functools
+import time
+
+from aiohttp import web
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by interpolating inside the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if seen + count >= target and count:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (target - seen) / count
+            seen += count
+            lower = bound
+        return lower
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.counters = {} # (name, labels) -> value
+        self.histograms = {} # (name, labels) -> Histogram
+
+    @staticmethod
+    def key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = self.key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = self.key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def timed(self, name: str, **labels):
+        """
+        Decorator for coroutine functions: records their duration in the `name` histogram
+        and counts exceptions in `<name>_errors_total`.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    self.inc(f"{name}_errors_total", **labels)
+                    raise
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def histograms_named(self, name: str) -> list:
+        """[(labels dict, Histogram)] for one metric name."""
+        return [(dict(labels), h) for (n, labels), h in self.histograms.items() if n == name]
+
+    def render_prometheus(self) -> str:
+        def fmt_labels(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+        lines = []
+        for name in sorted({n for n, _ in self.counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (n, labels), value in self.counters.items():
+                if n == name:
+                    lines.append(f"{name}{fmt_labels(labels)} {value}")
+
+        for name in sorted({n for n, _ in self.histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (n, labels), h in self.histograms.items():
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{fmt_labels(labels, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{fmt_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{fmt_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# --- aiosqlite instrumentation ---
+
+class TimedCall:
+    """Wraps an aiosqlite call so it can still be awaited or used with `async with`, and times it."""
+
+    def __init__(self, result, op: str, db: str):
+        self.result = result
+        self.op = op
+        self.db = db
+        self.start = time.perf_counter()
+
+    def record(self):
+        registry.observe("db_query_seconds", time.perf_counter() - self.start, db=self.db, op=self.op)
+
+    def __await__(self):
+        try:
+            return (yield from self.result.__await__())
+        finally:
+            self.record()
+
+    async def __aenter__(self):
+        try:
+            return await self.result.__aenter__()
+        finally:
+            self.record()
+
+    async def __aexit__(self, *exc):
+        return await self.result.__aexit__(*exc)
+
+
+def instrument_connection(conn, db: str):
+    """Times every execute/executemany/commit on an aiosqlite connection, labelled by SQL verb."""
+    for method in ("execute", "executemany", "commit"):
+        original = getattr(conn, method)
+
+        def wrapper(*args, _original=original, _method=method, **kwargs):
+            if _method == "commit":
+                op = "COMMIT"
+            else:
+                sql = args[0] if args else kwargs.get("sql", "")
+                op = sql.split(None, 1)[0].upper() if sql.strip() else "?"
+            return TimedCall(_original(*args, **kwargs), op, db)
+
+        setattr(conn, method, wrapper)
+    return conn
+
+
+# --- HTTP endpoint ---
+
+async def start_http_server(host: str, port: int) -> web.AppRunner:
+    """Serves GET /metrics in Prometheus text format. Returns the runner (call .cleanup() to stop)."""
+    async def handle_metrics(request):
+        return web.Response(text=registry.render_prometheus(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
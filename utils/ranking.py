@@ -0,0 +1,226 @@
+"""
+In-memory XP ranking index used by /leaderboard and /rank.
+
+Each guild keeps its members ordered by (xp DESC, user_id ASC) in a bucketed
+sorted list: a list of small sorted chunks plus the max key of every chunk.
+Finding a chunk is a bisect and chunks stay small. A Fenwick tree over the
+chunk lengths gives the number of members before any chunk, so inserts,
+removals, rank lookups and slices by position are all close to O(log n)
+without pulling in an extra dependency.
+"""
+from bisect import bisect_left, insort
+
+
+class SortedKeyList:
+    CHUNK_SIZE = 512
+
+    def __init__(self, items=()):
+        self.chunks = []
+        self.maxes = []
+        items = sorted(items)
+        for i in range(0, len(items), self.CHUNK_SIZE):
+            chunk = items[i:i + self.CHUNK_SIZE]
+            self.chunks.append(chunk)
+            self.maxes.append(chunk[-1])
+        self.length = len(items)
+        self.rebuild_counts()
+
+    def __len__(self) -> int:
+        return self.length
+
+    # --- Fenwick tree over chunk lengths (1-based, counts[i] covers a power-of-two run of chunks) ---
+
+    def rebuild_counts(self):
+        """O(chunks). Only needed when chunks are split or dropped, which is rare."""
+        n = len(self.chunks)
+        counts = [0] * (n + 1)
+        for i, chunk in enumerate(self.chunks, 1):
+            counts[i] += len(chunk)
+            parent = i + (i & -i)
+            if parent <= n:
+                counts[parent] += counts[i]
+        self.counts = counts
+
+    def add_count(self, pos: int, delta: int):
+        i = pos + 1
+        while i < len(self.counts):
+            self.counts[i] += delta
+            i += i & -i
+
+    def count_before(self, pos: int) -> int:
+        """Number of items in the chunks before chunk `pos`."""
+        total = 0
+        while pos > 0:
+            total += self.counts[pos]
+            pos -= pos & -pos
+        return total
+
+    def locate(self, index: int) -> tuple:
+        """(chunk, offset inside it) holding the item at 0-based position `index`."""
+        pos = 0
+        step = 1 << (len(self.chunks).bit_length() - 1) if self.chunks else 0
+        while step:
+            nxt = pos + step
+            if nxt < len(self.counts) and self.counts[nxt] <= index:
+                pos = nxt
+                index -= self.counts[nxt]
+            step >>= 1
+        return pos, index
+
+    def add(self, key):
+        if not self.chunks:
+            self.chunks.append([key])
+            self.maxes.append(key)
+            self.length = 1
+            self.rebuild_counts()
+            return
+
+        pos = bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            # Bigger than everything, goes at the end of the last chunk
+            pos -= 1
+            self.chunks[pos].append(key)
+            self.maxes[pos] = key
+        else:
+            insort(self.chunks[pos], key)
+        self.length += 1
+
+        # Keep chunks small so insort stays cheap
+        chunk = self.chunks[pos]
+        if len(chunk) > self.CHUNK_SIZE * 2:
+            half = len(chunk) // 2
+            self.chunks[pos:pos + 1] = [chunk[:half], chunk[half:]]
+            self.maxes[pos:pos + 1] = [chunk[half - 1], chunk[-1]]
+            self.rebuild_counts()
+        else:
+            self.add_count(pos, 1)
+
+    def remove(self, key):
+        pos = bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            raise ValueError(f"{key!r} not in list")
+        chunk = self.chunks[pos]
+        idx = bisect_left(chunk, key)
+        if idx == len(chunk) or chunk[idx] != key:
+            raise ValueError(f"{key!r} not in list")
+
+        del chunk[idx]
+        self.length -= 1
+        if not chunk:
+            del self.chunks[pos]
+            del self.maxes[pos]
+            self.rebuild_counts()
+            return
+        if idx == len(chunk):
+            self.maxes[pos] = chunk[-1]
+        self.add_count(pos, -1)
+
+    def index(self, key) -> int:
+        """0-based position of `key`."""
+        pos = bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            raise ValueError(f"{key!r} not in list")
+        chunk = self.chunks[pos]
+        idx = bisect_left(chunk, key)
+        if idx == len(chunk) or chunk[idx] != key:
+            raise ValueError(f"{key!r} not in list")
+        return self.count_before(pos) + idx
+
+    def slice(self, start: int, stop: int) -> list:
+        """Items from position start (inclusive) to stop (exclusive)."""
+        start = max(start, 0)
+        stop = min(stop, self.length)
+        if start >= stop:
+            return []
+        pos, offset = self.locate(start)
+        result = []
+        wanted = stop - start
+        while len(result) < wanted:
+            chunk = self.chunks[pos]
+            result.extend(chunk[offset:offset + wanted - len(result)])
+            pos += 1
+            offset = 0
+        return result
+
+
+class GuildRanking:
+    """Members of one guild ordered by XP (highest first)."""
+
+    def __init__(self, rows=()):
+        # rows: iterable of (user_id, xp, level)
+        self.members = {} # user_id -> (xp, level)
+        keys = []
+        for user_id, xp, level in rows:
+            self.members[user_id] = (xp, level)
+            keys.append((-xp, user_id))
+        self.order = SortedKeyList(keys)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def get(self, user_id: int):
+        """Returns (xp, level) or None."""
+        return self.members.get(user_id)
+
+    def update(self, user_id: int, xp: int, level: int):
+        old = self.members.get(user_id)
+        if old is not None:
+            if old[0] == xp:
+                self.members[user_id] = (xp, level)
+                return
+            self.order.remove((-old[0], user_id))
+        self.members[user_id] = (xp, level)
+        self.order.add((-xp, user_id))
+
+    def remove(self, user_id: int):
+        old = self.members.pop(user_id, None)
+        if old is not None:
+            self.order.remove((-old[0], user_id))
+
+    def rank_of(self, user_id: int):
+        """1-based rank, or None if the user has no XP yet."""
+        entry = self.members.get(user_id)
+        if entry is None:
+            return None
+        return self.order.index((-entry[0], user_id)) + 1
+
+    def page(self, start: int, count: int) -> list:
+        """Returns [(rank, user_id, xp, level)] starting at 0-based position `start`."""
+        rows = []
+        for offset, (neg_xp, user_id) in enumerate(self.order.slice(start, start + count)):
+            rows.append((start + offset + 1, user_id, -neg_xp, self.members[user_id][1]))
+        return rows
+
+    def top(self, count: int = 10) -> list:
+        return self.page(0, count)
+
+    def around(self, user_id: int, radius: int = 2) -> list:
+        """The user plus up to `radius` members above and below them."""
+        rank = self.rank_of(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return self.page(start, rank + radius - start)
+
+
+class RankingIndex:
+    """Per-guild rankings, built once from the DB and updated as XP changes."""
+
+    def __init__(self):
+        self.guilds = {} # guild_id -> GuildRanking
+
+    def load(self, rows):
+        """Rebuilds every guild from (guild_id, user_id, xp, level) rows."""
+        grouped = {}
+        for guild_id, user_id, xp, level in rows:
+            grouped.setdefault(guild_id, []).append((user_id, xp, level))
+        self.guilds = {guild_id: GuildRanking(members) for guild_id, members in grouped.items()}
+
+    def guild(self, guild_id: int) -> GuildRanking:
+        ranking = self.guilds.get(guild_id)
+        if ranking is None:
+            ranking = self.guilds[guild_id] = GuildRanking()
+        return ranking
+
+    def update(self, guild_id: int, user_id: int, xp: int, level: int):
+        self.guild(guild_id).update(user_id, xp, level)
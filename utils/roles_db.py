@@ -0,0 +1,66 @@
+"""
+Storage for the self-assignable role menus (roles.db).
+
+Categories and their roles are stored per guild, so each admin change is a
+small transaction instead of a rewrite of the whole config. Uses the same
+connection tuning and migration runner as levels.db.
+"""
+import os
+
+import aiosqlite
+
+from utils import levels_db
+from utils.metrics import instrument_connection
+
+
+async def connect(path: str) -> aiosqlite.Connection:
+    db_dir = os.path.dirname(path)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+
+    db = instrument_connection(await aiosqlite.connect(path), "roles")
+    db.row_factory = aiosqlite.Row
+    for pragma in levels_db.PRAGMAS:
+        await db.execute(pragma)
+    return db
+
+
+# --- Migrations ---
+
+async def migration_role_tables(db):
+    # role_categories:
+    #   name_key: lower-cased name, names are unique per guild ignoring case
+    #   position: display order inside the guild
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS role_categories (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            name TEXT,
+            name_key TEXT,
+            description TEXT,
+            is_exclusive INTEGER DEFAULT 0,
+            position INTEGER,
+            UNIQUE (guild_id, name_key)
+        )
+    """)
+    # menu_roles: the roles offered in a category, in display order
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS menu_roles (
+            category_id INTEGER,
+            role_id INTEGER,
+            label TEXT,
+            emoji TEXT,
+            position INTEGER,
+            PRIMARY KEY (category_id, role_id)
+        )
+    """)
+
+
+# (version, description, function). Append only, never reorder or edit applied ones.
+MIGRATIONS = [
+    (1, "role category tables", migration_role_tables),
+]
+
+
+async def migrate(db) -> list:
+    return await levels_db.migrate(db, MIGRATIONS)
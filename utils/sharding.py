@@ -0,0 +1,55 @@
+"""
+Helpers for running the bot sharded (one or more shards per process).
+
+Discord routes a guild to shard (guild_id >> 22) % shard_count. Each process
+only receives events for guilds on its own shards, so per-guild state
+(cooldowns, caches, ranking index, game views) is partitioned by simply
+loading and keeping the guilds this process owns.
+"""
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+def owned_shards(bot):
+    """(shard_count, shard ids run by this process), or None when the bot isn't sharded."""
+    shard_count = getattr(bot, "shard_count", None)
+    if not shard_count or shard_count <= 1:
+        return None
+    shard_ids = getattr(bot, "shard_ids", None) or range(shard_count)
+    return shard_count, list(shard_ids)
+
+
+def owns_guild(bot, guild_id: int) -> bool:
+    shards = owned_shards(bot)
+    if shards is None:
+        return True
+    shard_count, shard_ids = shards
+    return shard_for_guild(guild_id, shard_count) in shard_ids
+
+
+def guild_filter_sql(bot, column: str = "guild_id") -> tuple:
+    """
+    SQL condition (and params) that keeps only rows for guilds owned by this process.
+    Returns ("1", ()) when not sharded, so it can always be dropped into a WHERE clause.
+    """
+    shards = owned_shards(bot)
+    if shards is None:
+        return "1", ()
+    shard_count, shard_ids = shards
+    placeholders = ",".join("?" * len(shard_ids))
+    return f"(({column} >> 22) % ?) IN ({placeholders})", (shard_count, *shard_ids)
+
+
+def plan_clusters(total_shards: int, clusters: int) -> list:
+    """Splits shard ids into `clusters` contiguous groups, e.g. (5, 2) -> [[0, 1, 2], [3, 4]]."""
+    clusters = max(1, min(clusters, total_shards))
+    base, extra = divmod(total_shards, clusters)
+    plan = []
+    start = 0
+    for i in range(clusters):
+        size = base + (1 if i < extra else 0)
+        plan.append(list(range(start, start + size)))
+        start += size
+    return plan
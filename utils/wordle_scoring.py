@@ -0,0 +1,88 @@
+"""
+Scoring and board rendering shared by the Wordle-style games (wordle.py, horsele.py).
+
+A guess's feedback is packed into one base-3 integer, one digit per letter
+(first letter = least significant digit): 0 absent, 1 wrong spot, 2 correct.
+There are only 3^5 = 243 possible results, so every emoji row is built once
+up front and rendering a guess is a table lookup.
+"""
+from functools import lru_cache
+
+WORD_LENGTH = 5
+MAX_GUESSES = 6
+SCORE_CACHE_SIZE = 4096
+
+ABSENT, PRESENT, CORRECT = 0, 1, 2
+TILES = ("⬛", "🟨", "🟩")
+SOLVED = 3 ** WORD_LENGTH - 1 # every digit is CORRECT
+
+
+def _build_row(code: int) -> str:
+    tiles = []
+    for _ in range(WORD_LENGTH):
+        tiles.append(TILES[code % 3])
+        code //= 3
+    return " ".join(tiles)
+
+
+ROWS = tuple(_build_row(code) for code in range(3 ** WORD_LENGTH))
+EMPTY_ROW = ROWS[0]
+# Blank rows under the guesses, indexed by how many guesses were made
+EMPTY_ROWS = tuple((EMPTY_ROW + "\n") * (MAX_GUESSES - used) for used in range(MAX_GUESSES + 1))
+
+
+@lru_cache(maxsize=SCORE_CACHE_SIZE)
+def score(guess: str, answer: str) -> int:
+    """Feedback code for an uppercase guess. Repeated letters only score as often as they appear in the answer."""
+    # Letters of the answer that aren't matched exactly are left for the wrong-spot pass
+    unmatched = {}
+    for g, a in zip(guess, answer):
+        if g != a:
+            unmatched[a] = unmatched.get(a, 0) + 1
+
+    code = 0
+    place = 1
+    for g, a in zip(guess, answer):
+        if g == a:
+            code += CORRECT * place
+        elif unmatched.get(g):
+            unmatched[g] -= 1
+            code += PRESENT * place
+        place *= 3
+    return code
+
+
+def render_row(code: int) -> str:
+    return ROWS[code]
+
+
+class Board:
+    """
+    One game's guesses. The finished rows are kept as a string, so each
+    guess is scored and rendered once and only appended afterwards.
+    """
+    def __init__(self, answer: str, max_guesses: int = MAX_GUESSES):
+        self.answer = answer.upper()
+        self.max_guesses = max_guesses
+        self.guesses = []
+        self.codes = []
+        self.rows = ""
+
+    def add_guess(self, guess: str) -> int:
+        guess = guess.upper()
+        code = score(guess, self.answer)
+        self.guesses.append(guess)
+        self.codes.append(code)
+        self.rows += ROWS[code] + "\n"
+        return code
+
+    @property
+    def solved(self) -> bool:
+        return bool(self.codes) and self.codes[-1] == SOLVED
+
+    @property
+    def full(self) -> bool:
+        return len(self.guesses) >= self.max_guesses
+
+    def render(self) -> str:
+        return self.rows + EMPTY_ROWS[min(len(self.guesses), MAX_GUESSES)]
@@ -0,0 +1,54 @@
+"""
+Compact word dictionary for the Wordle games.
+
+Every 5-letter A-Z word maps to a number below 26^5, so a dictionary of any
+size fits in a fixed 1.5 MB bitmap and a lookup is a single bit test.
+A 100k-word list as a set of str would take ~8 MB.
+"""
+WORD_LENGTH = 5
+ALPHABET_SIZE = 26
+BITMAP_BITS = ALPHABET_SIZE ** WORD_LENGTH
+
+
+def word_index(word: str):
+    """Position of an uppercase A-Z word in the bitmap, or None if it can't be in the dictionary."""
+    if len(word) != WORD_LENGTH or not word.isascii() or not word.isalpha() or not word.isupper():
+        return None
+    index = 0
+    for code in word.encode("ascii"):
+        index = index * ALPHABET_SIZE + (code - 65)
+    return index
+
+
+class WordBitmap:
+    def __init__(self, words=()):
+        self.bits = bytearray(BITMAP_BITS // 8 + 1)
+        self.count = 0
+        for word in words:
+            self.add(word)
+
+    @classmethod
+    def from_file(cls, path: str, extra=()):
+        """One word per line (case-insensitive, other lines ignored), plus `extra` words."""
+        bitmap = cls(extra)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                bitmap.add(line.strip().upper())
+        return bitmap
+
+    def add(self, word: str) -> bool:
+        index = word_index(word)
+        if index is None:
+            return False
+        mask = 1 << (index & 7)
+        if not self.bits[index >> 3] & mask:
+            self.bits[index >> 3] |= mask
+            self.count += 1
+        return True
+
+    def __contains__(self, word: str) -> bool:
+        index = word_index(word)
+        return index is not None and bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __len__(self) -> int:
+        return self.count
@@ -1,16 +1,58 @@
-def calculate_xp_requirement(level: int) -> int:
-    """
-    Calculates the TOTAL XP required to reach a specific level.
-    Formula: 100 * (Level - 1)^2
-    """
-    return 100 * ((level - 1) ** 2)
+import random
+
+from utils.level_curve import (
+    MIN_LEVEL, level_from_xp, level_progress, level_start_xp, member_level, total_xp_for_level, xp_for_next_level
+)
+
+
+def reference_level_from_xp(xp: int) -> int:
+    """The original loop-based implementation, kept here as the source of truth."""
+    level = 0
+    while True:
+        xp_needed = 5 * (level ** 2) + 50 * level + 100
+        if xp >= xp_needed:
+            xp -= xp_needed
+            level += 1
+        else:
+            return level
+
+
+# --- Consistency checks ---
+
+# Cumulative total is the running sum of the per-level steps (starting at L=0)
+running = 0
+for level in range(0, 5000):
+    assert total_xp_for_level(level) == running, f"total_xp_for_level({level}) mismatch"
+    running += xp_for_next_level(level)
+
+# level_from_xp matches the loop at every XP value around the first thresholds
+for xp in range(0, 300_000):
+    assert level_from_xp(xp) == reference_level_from_xp(xp), f"level_from_xp({xp}) mismatch"
+
+# Random (including huge) XP values always land between the level's bounds
+rng = random.Random(1234)
+for _ in range(100_000):
+    xp = rng.randint(0, 2 ** 63 - 1)
+    level = level_from_xp(xp)
+    assert total_xp_for_level(level) <= xp < total_xp_for_level(level + 1), f"bounds broken at xp={xp}"
+
+# /rank progress is never negative and never reaches the next level's cost, including
+# members under 100 XP who are floored at MIN_LEVEL
+for xp in list(range(0, 300_000)) + [rng.randint(0, 2 ** 63 - 1) for _ in range(100_000)]:
+    progress, step = level_progress(xp, member_level(xp))
+    assert 0 <= progress < step, f"level_progress broken at xp={xp}: {progress} / {step}"
+
+print("All level curve checks passed.\n")
+
+
+# --- Progression table ---
 
 print(f"{'Level':<10} | {'Total XP Required':<20} | {'Delta from Prev':<15}")
 print("-" * 50)
 
 previous_xp = 0
-for level in range(1, 21):
-    xp = calculate_xp_requirement(level)
+for level in range(MIN_LEVEL, 21):
+    xp = level_start_xp(level)
     delta = xp - previous_xp
     print(f"{level:<10} | {xp:<20} | {delta:<15}")
     previous_xp = xp